@@ -0,0 +1,169 @@
+"""Benchmark CSVProcessor stage by stage on synthetic files.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run --tables repayment --rows 10000 1000000 \
+        --formats csv zip xlsx --encodings utf-8 cp1252 --sink stub \
+        --output bench_output.jsonl
+
+Each case prints one JSON object with rows/sec and peak RSS per stage;
+--output appends the same objects as JSON lines so runs can be compared
+across commits. --sink postgres loads into the DATABASES['default']
+tables with the configured loader instead of the in-memory stub.
+--transform-workers N transforms chunks in N worker processes, as
+IMPORT_TRANSFORM_WORKERS does for imports.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'csv_importer.settings')
+django.setup()
+
+import pandas as pd  # noqa: E402
+
+from core.models import ImportLog  # noqa: E402
+from core.services.csv_processor import CSVProcessor  # noqa: E402
+from core.services.loaders import get_loader  # noqa: E402
+from core.services.lookups import prime_lookup  # noqa: E402
+from core.services.transform_pool import TransformPool  # noqa: E402
+
+from .synthetic import generate_file, reference_lookups  # noqa: E402
+
+TABLES = [choice for choice, _ in ImportLog.TABLE_CHOICES]
+
+
+class StubLoader:
+    """Serializes chunks the way the COPY loader does, without a database."""
+    name = 'stub'
+
+    def load(self, chunk: pd.DataFrame, conn: Any = None) -> int:
+        chunk.to_csv(io.StringIO(), index=False, header=False, na_rep='\\N')
+        return len(chunk)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_case(
+    table_name: str,
+    rows: int,
+    file_format: str,
+    encoding: str,
+    sink: str,
+    seed: int,
+    workdir: str,
+    transform_workers: int = 0
+) -> Dict[str, Any]:
+    processor = CSVProcessor(table_name)
+
+    generation_start = time.perf_counter()
+    file_path = generate_file(
+        processor.plan.column_map, rows, seed, file_format, encoding,
+        workdir, f'{table_name}_{rows}_{encoding}'
+    )
+    generation_seconds = time.perf_counter() - generation_start
+
+    if sink == 'stub':
+        loader: Any = StubLoader()
+        for lookup_table, lookup in reference_lookups().items():
+            prime_lookup(lookup_table, lookup)
+    else:
+        loader = get_loader(processor.engine, table_name)
+
+    metrics = processor.metrics
+    source = processor.open_source(file_path)
+    processor.file_profile = source.profile
+
+    conn = processor.engine.connect() if sink == 'postgres' else None
+    total_start = time.perf_counter()
+    loaded = 0
+    # Forked after the lookups are primed, so workers inherit them
+    pool = TransformPool(table_name, source.profile, transform_workers) if transform_workers else None
+    try:
+        chunks = enumerate(source, start=1)
+        for _, chunk, _ in processor._transform_chunks(chunks, pool):
+            with metrics.stage('insert'):
+                loaded += loader.load(chunk, conn)
+                if conn is not None:
+                    conn.commit()
+    finally:
+        if pool is not None:
+            pool.close()
+        if conn is not None:
+            conn.close()
+            loader.close()
+    total_seconds = time.perf_counter() - total_start
+
+    stages = metrics.to_dict()
+    for stats in stages.values():
+        stats['rows_per_second'] = round(loaded / stats['wall_seconds'], 1) if stats['wall_seconds'] else None
+
+    return {
+        'commit': git_commit(),
+        'table': table_name,
+        'rows': rows,
+        'rows_loaded': loaded,
+        'format': file_format,
+        'encoding': encoding,
+        'sink': loader.name,
+        'transform_workers': transform_workers,
+        'seed': seed,
+        'file_bytes': os.path.getsize(file_path),
+        'generation_seconds': round(generation_seconds, 4),
+        'total_seconds': round(total_seconds, 4),
+        'rows_per_second': round(loaded / total_seconds, 1) if total_seconds else None,
+        'file_profile': source.profile.to_dict() if source.profile else None,
+        'stages': stages,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', nargs='+', choices=TABLES, default=TABLES)
+    parser.add_argument('--rows', nargs='+', type=int, default=[10_000])
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'zip', 'xlsx'], default=['csv'])
+    parser.add_argument('--encodings', nargs='+', default=['utf-8'],
+                        help="CSV encodings to write, e.g. utf-8 utf-8-sig cp1252")
+    parser.add_argument('--sink', choices=['stub', 'postgres'], default='stub')
+    parser.add_argument('--transform-workers', type=int, default=0,
+                        help="Transform chunks in this many worker processes (see IMPORT_TRANSFORM_WORKERS)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--workdir', default=None, help="Directory for generated files (default: a temp dir)")
+    parser.add_argument('--output', default=None, help="Append results as JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        for table_name in args.tables:
+            for rows in args.rows:
+                for file_format in args.formats:
+                    # Excel files carry no text encoding of their own
+                    encodings = ['utf-8'] if file_format == 'xlsx' else args.encodings
+                    for encoding in encodings:
+                        result = run_case(
+                            table_name, rows, file_format, encoding, args.sink, args.seed, workdir,
+                            args.transform_workers
+                        )
+                        line = json.dumps(result)
+                        print(line, flush=True)
+                        if args.output:
+                            with open(args.output, 'a') as output:
+                                output.write(line + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
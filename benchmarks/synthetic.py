@@ -0,0 +1,182 @@
+"""Seeded generators for synthetic civil_servant, repayment and loan_details files."""
+import csv
+import os
+import zipfile
+from typing import Dict, Iterator
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+BATCH_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit, less the header row
+
+FIRST_NAMES = ['Adebayo', 'Chinedu', 'Ngozi', 'Aisha', 'Ibrahim', 'Oluwaségun', 'José', 'Ñnamdi', 'Funmilayo', 'Emeka']
+LAST_NAMES = ['Okafor', 'Balogun', 'Abubakar', 'Eze', 'Adéwálé', 'Musa', 'Okonkwo', 'Bello', 'Ogunleye', 'Nwosu']
+WORDS = ['Lagos', 'Abuja', 'Kano', 'Ibadan', 'Enugu', 'Headquarters', 'Zone A', 'Zone B', 'Finance', 'Works']
+BANKS = ['First Bank', 'Zenith Bank', 'GTBank', 'Access Bank', 'UBA', 'Union Bank']
+CATEGORIES = ['Police', 'Civil Defence', 'Customs', 'Federal', 'State', 'Paramilitary']
+PRODUCTS = ['Salary Loan', 'Asset Finance', 'Top Up', 'SL01', 'AF02']
+LOAN_TYPES = ['RENEWAL', 'NEWLOAN', 'TOPUP', 'LOANCOMPLETED', 'NEW LOAN', 'TOP UP', ' RENEWAL']
+GENDERS = ['M', 'F', 'Male', 'Female', 'm', 'f']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+MONEY_COLUMNS = {
+    'amount', 'loan_amount', 'deduction', 'wacs_monthly_deduction_amount', 'net_payment',
+    'old_loan_amount', 'new_loan_amount', 'one_percent', 'one_five_percent',
+    'disbursement_amount', 'insurance', 'admin_fee', 'loan_balance', 'preliquidation_fee',
+}
+DATE_COLUMNS = {'date_of_first_application', 'birthdate', 'disbursement_dates'}
+NAME_COLUMNS = {'name', 'employee_name', 'full_name', 'staff_name', 'beneficiary', 'relation_officer', 'initiated_by'}
+BLANK_RATE = 0.01
+
+
+def _digits(rng: np.random.Generator, rows: int, length: int) -> np.ndarray:
+    return rng.integers(10 ** (length - 1), 10 ** length, size=rows).astype(str)
+
+
+def _money(rng: np.random.Generator, rows: int) -> np.ndarray:
+    values = rng.gamma(2.0, 40_000.0, size=rows).round(2)
+    formatted = pd.Series(values).map('{:,.2f}'.format).to_numpy(dtype=object)
+    # Mix plain numbers, thousands separators and currency symbols as partners do
+    style = rng.integers(0, 3, size=rows)
+    plain = pd.Series(values).astype(str).to_numpy(dtype=object)
+    return np.where(style == 0, plain, np.where(style == 1, formatted, '₦' + formatted))
+
+
+def _dates(rng: np.random.Generator, rows: int) -> np.ndarray:
+    # Payroll files repeat a handful of dates
+    pool = pd.date_range('2015-01-01', periods=120, freq='MS').strftime('%d/%m/%Y').to_numpy()
+    return rng.choice(pool, size=rows)
+
+
+def _column_values(column: str, rng: np.random.Generator, rows: int) -> np.ndarray:
+    if column in MONEY_COLUMNS:
+        return _money(rng, rows)
+    if column in DATE_COLUMNS:
+        return _dates(rng, rows)
+    if column in NAME_COLUMNS:
+        return np.char.add(np.char.add(rng.choice(FIRST_NAMES, size=rows), ' '), rng.choice(LAST_NAMES, size=rows))
+    if column == 'loan_tenor':
+        return rng.integers(1, 61, size=rows).astype(str)
+    if column == 'bvn':
+        return _digits(rng, rows, 11)
+    if column in ('account_number', 'account_no', 'account_id'):
+        return _digits(rng, rows, 10)
+    if column in ('grade_level', 'step'):
+        return rng.integers(1, 18, size=rows).astype(str)
+    if column == 'gender':
+        return rng.choice(GENDERS, size=rows)
+    if column == 'month_field':
+        return rng.choice(MONTHS, size=rows)
+    if column == 'year':
+        return rng.integers(2020, 2026, size=rows).astype(str)
+    if column == 'loan_type':
+        return rng.choice(LOAN_TYPES, size=rows)
+    if column == 'civil_servant_type_id':
+        return rng.choice(CATEGORIES, size=rows)
+    if column == 'product_id':
+        return rng.choice(PRODUCTS, size=rows)
+    if column in ('bank_name', 'bank'):
+        return rng.choice(BANKS, size=rows)
+    if column.endswith(('_number', '_no', '_id', '_psn', '_code')) or column in ('code', 'ippis_number'):
+        return _digits(rng, rows, 6)
+    return rng.choice(WORDS, size=rows)
+
+
+def generate_batches(column_map: Dict, rows: int, seed: int) -> Iterator[pd.DataFrame]:
+    """Yields DataFrames of synthetic rows using the file headers of a column map."""
+    rng = np.random.default_rng(seed)
+    # One header per target column, as in a real export
+    first_headers: Dict[str, object] = {}
+    for header, target in column_map.items():
+        first_headers.setdefault(target, header)
+    headers = [str(header) for header in first_headers.values()]
+    targets = list(first_headers)
+
+    remaining = rows
+    while remaining > 0:
+        batch_rows = min(BATCH_ROWS, remaining)
+        data = {}
+        for header, target in zip(headers, targets):
+            values = _column_values(target, rng, batch_rows).astype(object)
+            values[rng.random(batch_rows) < BLANK_RATE] = ''
+            data[header] = values
+        yield pd.DataFrame(data, columns=headers)
+        remaining -= batch_rows
+
+
+def write_csv(path: str, batches: Iterator[pd.DataFrame], encoding: str) -> None:
+    first = True
+    for batch in batches:
+        batch.to_csv(
+            path,
+            mode='w' if first else 'a',
+            header=first,
+            index=False,
+            encoding=encoding if first else encoding.replace('-sig', ''),
+            errors='replace',
+            quoting=csv.QUOTE_MINIMAL
+        )
+        first = False
+
+
+def write_xlsx(path: str, batches: Iterator[pd.DataFrame]) -> None:
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    written = 0
+    for batch in batches:
+        if written == 0:
+            sheet.append(list(batch.columns))
+        batch = batch.iloc[:XLSX_MAX_ROWS - written]
+        for row in batch.itertuples(index=False, name=None):
+            sheet.append(row)
+        written += len(batch)
+        if written >= XLSX_MAX_ROWS:
+            break
+    workbook.save(path)
+
+
+def generate_file(
+    column_map: Dict,
+    rows: int,
+    seed: int,
+    file_format: str,
+    encoding: str,
+    directory: str,
+    name: str
+) -> str:
+    """Writes a synthetic file in the given format and returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    batches = generate_batches(column_map, rows, seed)
+
+    if file_format == 'xlsx':
+        path = os.path.join(directory, f'{name}.xlsx')
+        write_xlsx(path, batches)
+        return path
+
+    csv_path = os.path.join(directory, f'{name}.csv')
+    write_csv(csv_path, batches, encoding)
+    if file_format == 'csv':
+        return csv_path
+
+    zip_path = os.path.join(directory, f'{name}.zip')
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(csv_path, arcname=os.path.basename(csv_path))
+    os.remove(csv_path)
+    return zip_path
+
+
+def reference_lookups() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Lookup tables matching the synthetic categories and products, for the stub sink."""
+    return {
+        'civil_servant_category': {
+            'name': {name.lower(): index for index, name in enumerate(CATEGORIES, start=1)},
+        },
+        'repayment_product': {
+            'name': {name.lower(): index for index, name in enumerate(PRODUCTS[:3], start=1)},
+            'code': {code.lower(): index for index, code in enumerate(PRODUCTS[3:], start=1)},
+        },
+    }
+
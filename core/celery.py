@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from kombu import Exchange, Queue
 
 # set the default Django settings module for the 'celery' program.
@@ -18,6 +19,10 @@ default_exchange = Exchange('default', type='direct')
 
 app.conf.task_queues = (
     Queue('default', default_exchange, routing_key='default'),
+    # Imports are split by size so large files cannot starve small ones;
+    # run a worker per queue with its own concurrency (see README)
+    Queue('imports_small', default_exchange, routing_key='imports_small'),
+    Queue('imports_large', default_exchange, routing_key='imports_large'),
 )
 
 app.conf.update(
@@ -49,11 +54,32 @@ app.conf.update(
     # Performance optimizations
     worker_lost_wait=30,
     worker_disable_rate_limits=False,
+
+    # Periodic tasks, run by `celery -A core.celery beat`
+    beat_schedule={
+        'expire-upload-sessions': {
+            'task': 'core.tasks.expire_upload_sessions',
+            'schedule': 3600,
+        },
+    },
 )
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def init_worker_engine(**kwargs):
+    """Give each worker process its own pooled database engine."""
+    from core.services.db import init_engine
+    init_engine()
+
+
+@worker_process_shutdown.connect
+def dispose_worker_engine(**kwargs):
+    from core.services.db import dispose_engine
+    dispose_engine()
+
 # @app.task(bind=True)
 # def debug_task(self):
 #     print('Request: {0!r}'.format(self.request))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_remove_importlog_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='file_profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
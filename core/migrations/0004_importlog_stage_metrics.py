@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_importlog_file_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='stage_metrics',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
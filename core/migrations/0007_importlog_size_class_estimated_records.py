@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_importlog_started_at_task_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='size_class',
+            field=models.CharField(default='small', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='estimated_records',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_importlog_size_class_estimated_records'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=500)),
+                ('table_name', models.CharField(choices=[('civil_servant', 'Civil Servant'), ('repayment', 'Repayment'), ('loan_details', 'Loan Details')], max_length=50)),
+                ('total_size', models.BigIntegerField()),
+                ('part_size', models.IntegerField()),
+                ('total_parts', models.IntegerField()),
+                ('status', models.CharField(choices=[('open', 'Open'), ('completing', 'Completing'), ('completed', 'Completed')], default='open', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('import_log', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_session', to='core.importlog')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_number', models.IntegerField()),
+                ('size', models.IntegerField()),
+                ('checksum', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='core.uploadsession')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='uploadpart',
+            constraint=models.UniqueConstraint(fields=('session', 'part_number'), name='unique_upload_part'),
+        ),
+    ]
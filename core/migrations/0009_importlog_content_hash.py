@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_uploadsession_uploadpart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_importlog_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='sheets',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
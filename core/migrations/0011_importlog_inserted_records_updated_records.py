@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_importlog_sheets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='inserted_records',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='updated_records',
+            field=models.IntegerField(default=0),
+        ),
+    ]
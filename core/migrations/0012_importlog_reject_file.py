@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_importlog_inserted_records_updated_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='reject_file',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_importlog_reject_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='validation_report',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_importlog_validation_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='chunks_ahead',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from typing import Any, List, Tuple
 from django.db import models
 from django.utils import timezone
 
@@ -17,14 +18,27 @@ class ImportLog(models.Model):
     ]
     
     file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, null=True, blank=True)  # Stored upload, kept for resuming failed imports
     table_name = models.CharField(max_length=50, choices=TABLE_CHOICES)
     total_records = models.IntegerField(default=0)
     successful_records = models.IntegerField(default=0)
     failed_records = models.IntegerField(default=0)
+    inserted_records = models.IntegerField(default=0)  # Rows added to the table
+    updated_records = models.IntegerField(default=0)  # Existing rows replaced by the upsert loader
+    validation_report = models.JSONField(null=True, blank=True)  # Rows checked and failures per validation rule
+    reject_file = models.CharField(max_length=500, null=True, blank=True)  # CSV of rows the database rejected, with errors
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     error_message = models.TextField(null=True, blank=True)
+    file_profile = models.JSONField(null=True, blank=True)  # Detected encoding and CSV dialect
+    stage_metrics = models.JSONField(null=True, blank=True)  # Wall time, CPU time and peak RSS per pipeline stage
     created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, null=True, blank=True)  # Celery task that claimed the import
+    size_class = models.CharField(max_length=10, default='small')  # Decides the queue the import is routed to
+    estimated_records = models.IntegerField(default=0)  # Row count estimated at upload
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)  # SHA-256 of the uploaded bytes
+    sheets = models.JSONField(null=True, blank=True)  # Excel sheets to import, ['*'] for all; null for the active sheet
     # created_by = models.IntegerField()  # User ID who initiated import
 
     class Meta:
@@ -32,3 +46,85 @@ class ImportLog(models.Model):
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['table_name', 'created_at'])
         ]
+
+    @classmethod
+    def transition(cls, import_log_id: int, from_statuses: List[str], to_status: str, **fields: Any) -> bool:
+        """Moves an import to a new status only if it is in one of from_statuses.
+
+        A single compare-and-set UPDATE, so no row lock is held and status
+        polling never waits on a running import. Returns False if another
+        process moved the import first.
+        """
+        updated = cls.objects.filter(
+            id=import_log_id, status__in=from_statuses
+        ).update(status=to_status, **fields)
+        return updated == 1
+
+    @classmethod
+    def claim(cls, import_log_id: int, task_id: str) -> bool:
+        """Claims a pending import for a task.
+
+        The task that claimed an import may claim it again, so retries and
+        redeliveries of the same task (which keep their task id) can resume it.
+        """
+        updated = cls.objects.filter(
+            models.Q(status='pending') | models.Q(status='processing', task_id=task_id),
+            id=import_log_id
+        ).update(status='processing', task_id=task_id, started_at=timezone.now())
+        return updated == 1
+
+
+class ImportCheckpoint(models.Model):
+    """Last chunk committed for an import (or one shard of it), so retries resume instead of restarting"""
+    import_log = models.ForeignKey(ImportLog, on_delete=models.CASCADE, related_name='checkpoints')
+    shard = models.IntegerField(default=0)  # 0 for unsharded imports, shard number otherwise
+    chunks_committed = models.IntegerField(default=0)
+    # Chunks committed past chunks_committed, when transform workers deliver them out of order
+    chunks_ahead = models.JSONField(default=list, blank=True)
+    rows_committed = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['import_log', 'shard'], name='unique_import_checkpoint')
+        ]
+
+
+class UploadSession(models.Model):
+    """A file uploaded in numbered parts that are written in place into one file on disk"""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('completing', 'Completing'),
+        ('completed', 'Completed')
+    ]
+
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)  # Assembled file, preallocated to total_size
+    table_name = models.CharField(max_length=50, choices=ImportLog.TABLE_CHOICES)
+    total_size = models.BigIntegerField()
+    part_size = models.IntegerField()  # Every part but the last is exactly this size
+    total_parts = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    import_log = models.OneToOneField(ImportLog, null=True, blank=True, on_delete=models.SET_NULL, related_name='upload_session')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def part_range(self, part_number: int) -> Tuple[int, int]:
+        """Byte offset and length of a part in the assembled file."""
+        if not 1 <= part_number <= self.total_parts:
+            raise ValueError(f"Part number must be between 1 and {self.total_parts}")
+        offset = (part_number - 1) * self.part_size
+        return offset, min(self.part_size, self.total_size - offset)
+
+
+class UploadPart(models.Model):
+    """A part of an upload session that was written and passed its checksum"""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='parts')
+    part_number = models.IntegerField()
+    size = models.IntegerField()
+    checksum = models.CharField(max_length=64)  # SHA-256 hex digest
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'part_number'], name='unique_upload_part')
+        ]
@@ -0,0 +1,115 @@
+import logging
+import time
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from .detection import estimate_row_count
+from .transform_pool import CHUNKS_PER_WORKER
+
+logger = logging.getLogger(__name__)
+
+SIZE_SMALL = 'small'
+SIZE_LARGE = 'large'
+
+RESERVATIONS_KEY = 'csv_importer:admission:reservations'
+EXPIRIES_KEY = 'csv_importer:admission:expiries'
+
+# Reserves memory for an import if the budget allows it. Expired reservations
+# (from workers that died without releasing) are dropped first. An import is
+# always admitted when nothing else is reserved, so one job larger than the
+# whole budget still runs on its own. Re-reserving an id is a no-op.
+RESERVE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[4])
+for _, id in ipairs(expired) do
+    redis.call('HDEL', KEYS[1], id)
+    redis.call('ZREM', KEYS[2], id)
+end
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return 1
+end
+local total = 0
+for _, value in ipairs(redis.call('HVALS', KEYS[1])) do
+    total = total + tonumber(value)
+end
+if total > 0 and total + tonumber(ARGV[2]) > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[5], ARGV[1])
+return 1
+"""
+
+
+def classify_upload(file_path: str, file_size: int, known_rows: Optional[int] = None) -> Tuple[str, int]:
+    """Returns the size class and estimated row count of an uploaded file."""
+    if known_rows is not None:
+        estimated_rows = known_rows
+    else:
+        try:
+            estimated_rows = estimate_row_count(file_path)
+        except Exception as e:
+            logger.warning(f"Could not estimate rows for {file_path}: {e}")
+            estimated_rows = 0
+
+    large = (
+        file_size >= settings.IMPORT_LARGE_FILE_BYTES
+        or estimated_rows >= settings.IMPORT_LARGE_ROW_COUNT
+    )
+    return (SIZE_LARGE if large else SIZE_SMALL), estimated_rows
+
+
+def queue_for(size_class: str) -> str:
+    """Celery queue that imports of a size class are routed to."""
+    return settings.IMPORT_QUEUES.get(size_class, settings.IMPORT_QUEUES[SIZE_SMALL])
+
+
+def estimate_memory_mb(file_size: int, estimated_rows: int, chunk_size: int) -> int:
+    """Rough peak memory of one import: a few copies of a chunk plus interpreter baseline.
+
+    Transform workers each add a baseline, and every chunk they may hold in
+    flight adds a chunk.
+    """
+    bytes_per_row = file_size / estimated_rows if estimated_rows else 1024
+    chunk_mb = bytes_per_row * chunk_size / (1024 * 1024)
+    workers = settings.IMPORT_TRANSFORM_WORKERS
+    chunks = 1 + workers * CHUNKS_PER_WORKER
+    return int(
+        settings.IMPORT_BASELINE_MEMORY_MB * (1 + workers)
+        + chunk_mb * settings.IMPORT_MEMORY_EXPANSION * chunks
+    )
+
+
+def reservation_key(import_log_id: int, part: Optional[int] = None) -> str:
+    """Reservation id of an import, or of one shard, archive member or worksheet of it."""
+    return str(import_log_id) if part is None else f'{import_log_id}:{part}'
+
+
+def try_reserve(import_log_id: int, memory_mb: int, part: Optional[int] = None) -> bool:
+    """Reserves memory for a large import, or one part of it, against the shared worker budget."""
+    now = time.time()
+    key = reservation_key(import_log_id, part)
+    try:
+        redis = get_redis_connection('default')
+        admitted = redis.eval(
+            RESERVE_SCRIPT, 2, RESERVATIONS_KEY, EXPIRIES_KEY,
+            key, memory_mb, settings.IMPORT_WORKER_MEMORY_BUDGET_MB,
+            now, now + settings.IMPORT_RESERVATION_TTL
+        )
+    except Exception as e:
+        # Without the shared budget, admit rather than stall every large import
+        logger.warning(f"Admission control unavailable, admitting import {key}: {e}")
+        return True
+    return bool(admitted)
+
+
+def release(import_log_id: int, part: Optional[int] = None) -> None:
+    """Returns the memory reservation of an import, or one part of it, to the budget."""
+    key = reservation_key(import_log_id, part)
+    try:
+        redis = get_redis_connection('default')
+        redis.hdel(RESERVATIONS_KEY, key)
+        redis.zrem(EXPIRIES_KEY, key)
+    except Exception as e:
+        logger.warning(f"Could not release admission reservation for import {key}: {e}")
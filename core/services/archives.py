@@ -0,0 +1,64 @@
+import logging
+import os
+import zipfile
+from typing import IO, List
+
+logger = logging.getLogger(__name__)
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+def is_archive(file_path: str) -> bool:
+    return file_path.endswith('.zip')
+
+
+def csv_members(file_path: str) -> List[str]:
+    """Names of the delimited-text members of a ZIP archive, in archive order.
+
+    Directories, macOS resource forks, hidden files and Excel workbooks are
+    skipped.
+    """
+    with zipfile.ZipFile(file_path, 'r') as archive:
+        members = [
+            info.filename for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith('__MACOSX/')
+            and not os.path.basename(info.filename).startswith('.')
+            and not info.filename.lower().endswith(EXCEL_EXTENSIONS)
+        ]
+    if not members:
+        raise ValueError(f"No CSV members found in {file_path}")
+    return members
+
+
+def members_size(file_path: str, members: List[str]) -> int:
+    """Uncompressed size of the given members."""
+    with zipfile.ZipFile(file_path, 'r') as archive:
+        return sum(archive.getinfo(member).file_size for member in members)
+
+
+def read_member_head(file_path: str, member: str, size: int) -> bytes:
+    """Reads the first bytes of a member without extracting it."""
+    with zipfile.ZipFile(file_path, 'r') as archive, archive.open(member) as stream:
+        return stream.read(size)
+
+
+class MemberStream:
+    """Context manager that opens one archive member as a decompressing binary stream."""
+
+    def __init__(self, file_path: str, member: str):
+        self.file_path = file_path
+        self.member = member
+
+    def __enter__(self) -> IO[bytes]:
+        self._archive = zipfile.ZipFile(self.file_path, 'r')
+        try:
+            self._stream = self._archive.open(self.member)
+        except Exception:
+            self._archive.close()
+            raise
+        return self._stream
+
+    def __exit__(self, *exc_info) -> None:
+        self._stream.close()
+        self._archive.close()
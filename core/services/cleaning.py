@@ -0,0 +1,145 @@
+import logging
+import warnings
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+logger = logging.getLogger(__name__)
+
+CURRENCY_SYMBOLS = r'[₦$]'
+DATE_SAMPLE_SIZE = 200
+DATE_CACHE_LIMIT = 100_000
+
+
+def parse_numbers(series: pd.Series, thousands: str = ',', decimal: str = '.') -> Tuple[pd.Series, pd.Series]:
+    """Parses money or count text into floats, NaN where empty or unparseable.
+
+    Currency symbols and thousands separators are stripped with string
+    operations before a single pd.to_numeric call. Also returns the mask of
+    empty values, so callers can tell them apart from parse failures.
+    """
+    text = series.astype('string').str.strip()
+    empty = text.isna() | (text == '')
+
+    cleaned = text.str.replace(CURRENCY_SYMBOLS, '', regex=True).str.replace(thousands, '', regex=False)
+    if decimal != '.':
+        cleaned = cleaned.str.replace(decimal, '.', regex=False)
+
+    return pd.to_numeric(cleaned, errors='coerce'), empty.fillna(True).astype(bool)
+
+
+def coerce_numeric(
+    series: pd.Series,
+    integer: bool = False,
+    thousands: str = ',',
+    decimal: str = '.'
+) -> Tuple[pd.Series, int]:
+    """Parses a column of money or count values without per-cell Python calls.
+
+    Empty values become 0, as do values that fail to parse; the number of
+    failures is returned alongside the converted column.
+    """
+    numbers, empty = parse_numbers(series, thousands, decimal)
+    failed = numbers.isna() & ~empty
+
+    if integer:
+        fractional = numbers.notna() & (numbers % 1 != 0)
+        failed |= fractional
+        numbers = numbers.mask(fractional)
+        return numbers.fillna(0).astype('int64'), int(failed.sum())
+
+    return numbers.fillna(0.0).astype('float64'), int(failed.sum())
+
+
+def clean_numeric_columns(
+    chunk: pd.DataFrame,
+    numeric_columns: Iterable[str],
+    integer_columns: Iterable[str] = (),
+    thousands: str = ',',
+    decimal: str = '.'
+) -> Dict[str, int]:
+    """Converts the numeric columns present in a chunk in place.
+
+    Returns the number of values per column that could not be parsed.
+    """
+    integer_columns = set(integer_columns)
+    failures: Dict[str, int] = {}
+    for col in numeric_columns:
+        if col in chunk.columns:
+            chunk[col], failed = coerce_numeric(
+                chunk[col],
+                integer=col in integer_columns,
+                thousands=thousands,
+                decimal=decimal
+            )
+            if failed:
+                failures[col] = failed
+    return failures
+
+
+def infer_date_format(values: List[str]) -> Optional[str]:
+    """Guesses the strftime format that parses the largest share of a sample."""
+    sample = values[:DATE_SAMPLE_SIZE]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        candidates = Counter(fmt for fmt in map(guess_datetime_format, sample) if fmt)
+
+    best_format, best_parsed = None, 0
+    for fmt, _ in candidates.most_common(3):
+        parsed = pd.to_datetime(pd.Series(sample), format=fmt, errors='coerce').notna().sum()
+        if parsed > best_parsed:
+            best_format, best_parsed = fmt, parsed
+    return best_format
+
+
+class DateParser:
+    """Parses date columns through a cache of unique values.
+
+    The format is inferred once from the first sample and used for a single
+    vectorized pd.to_datetime call over the values not seen before; only
+    values that do not match it fall back to per-value parsing.
+    """
+
+    def __init__(self) -> None:
+        self.date_format: Optional[str] = None
+        self._cache: Dict[str, Optional[date]] = {}
+
+    def _parse_new_values(self, values: List[str]) -> None:
+        if self.date_format is None:
+            self.date_format = infer_date_format(values)
+            logger.info(f"Inferred date format: {self.date_format}")
+
+        if self.date_format:
+            parsed = pd.to_datetime(pd.Series(values), format=self.date_format, errors='coerce')
+        else:
+            parsed = pd.Series(pd.NaT, index=range(len(values)))
+
+        for value, timestamp in zip(values, parsed):
+            if pd.isna(timestamp):
+                # Slow path for values that do not match the inferred format
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)
+                    timestamp = pd.to_datetime(value, errors='coerce')
+            self._cache[value] = timestamp.date() if not pd.isna(timestamp) else None
+
+    def parse(self, series: pd.Series) -> Tuple[pd.Series, int]:
+        """Converts a column to date objects, returning it with the count of unparseable values."""
+        text = series.astype('string').str.strip()
+        text = text.mask(text.isin(['', 'None', 'nan', 'NaT']))
+
+        unique_values = text.dropna().unique()
+        new_values = [value for value in unique_values if value not in self._cache]
+        # Evict before parsing, so every value of this column is still cached when it is mapped
+        if len(self._cache) + len(new_values) > DATE_CACHE_LIMIT:
+            self._cache.clear()
+            new_values = list(unique_values)
+        if new_values:
+            self._parse_new_values(new_values)
+
+        dates = text.map(self._cache, na_action='ignore').astype(object)
+        dates = dates.where(dates.notna(), None)
+        failed = int(dates.isna().sum() - text.isna().sum())
+        return dates, failed
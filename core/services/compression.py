@@ -0,0 +1,82 @@
+import bz2
+import gzip
+import io
+import logging
+import lzma
+from typing import IO, Optional, Tuple
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+MAGIC_NUMBERS = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+MAGIC_BYTES = max(len(magic) for magic, _ in MAGIC_NUMBERS)
+
+
+def compression_from_magic(head: bytes) -> Optional[str]:
+    """Names the compression format whose magic number starts head, if any."""
+    return next((name for magic, name in MAGIC_NUMBERS if head.startswith(magic)), None)
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    with open(file_path, 'rb') as file:
+        return compression_from_magic(file.read(MAGIC_BYTES))
+
+
+def open_decompressed(raw: IO[bytes], compression: str) -> IO[bytes]:
+    """Wraps a binary stream in a decompressing reader; nothing is written to disk."""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(raw, mode='rb')
+    if compression == 'xz':
+        return lzma.LZMAFile(raw, mode='rb')
+    if compression == 'zstd':
+        # read_across_frames so multi-frame files are read to the end; closefd=False because,
+        # like the other readers here, closing the decompressed stream must leave raw open
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+        )
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class DecompressedStream:
+    """Context manager that opens a compressed file as a decompressed binary stream."""
+
+    def __init__(self, file_path: str, compression: str):
+        self.file_path = file_path
+        self.compression = compression
+
+    def __enter__(self) -> IO[bytes]:
+        self._raw = open(self.file_path, 'rb')
+        try:
+            self._stream = open_decompressed(self._raw, self.compression)
+        except Exception:
+            self._raw.close()
+            raise
+        return self._stream
+
+    def __exit__(self, *exc_info) -> None:
+        self._stream.close()
+        self._raw.close()
+
+
+def sample_decompressed(file_path: str, compression: str, size: int) -> Tuple[bytes, float]:
+    """Returns the first size decompressed bytes and the expansion ratio seen so far.
+
+    The ratio is decompressed bytes over compressed bytes consumed, which is
+    close enough to size a whole file from its head.
+    """
+    with open(file_path, 'rb') as raw:
+        stream = open_decompressed(raw, compression)
+        try:
+            head = stream.read(size)
+            consumed = raw.tell()
+        finally:
+            stream.close()
+    return head, (len(head) / consumed if consumed else 1.0)
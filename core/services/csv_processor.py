@@ -1,394 +1,137 @@
-import zipfile
-import chardet
+import openpyxl
 import pandas as pd
-import io
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+import json
 import logging
 from django.conf import settings
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-import numpy as np
+from typing import IO, List, Dict, Any, FrozenSet, Iterator, Optional, Tuple, Union
+from .cleaning import DateParser, clean_numeric_columns
+from .db import get_engine
+from .archives import MemberStream, csv_members, is_archive
+from .compression import DecompressedStream, detect_compression
+from .detection import (
+    FileProfile, detect_compressed_profile, detect_file_profile, detect_member_profile, replaced_bytes
+)
+from .loaders import get_loader
+from .lookups import get_lookup, map_lookup
+from .metrics import StageMetrics
+from .rejects import Reject, is_row_error, reject_file_path, short_error, write_rejects
+from .schema import get_plan
+from .validation import NumberFormat, RuleSet
+from .sharding import open_shard
+from .transform_pool import TransformPool
 
 logger = logging.getLogger(__name__)
 
+
+class ImportSource:
+    """A single lazily parsed pass over an uploaded file.
+
+    The first chunk is parsed on demand so callers can inspect the header
+    before the load starts; iterating the source then replays that chunk
+    and continues with the rest of the file without parsing it again.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        chunks: Iterator[pd.DataFrame],
+        profile: Optional[FileProfile] = None,
+        metrics: Optional[StageMetrics] = None,
+        member: Optional[str] = None,
+        sheet: Optional[str] = None,
+        compression: Optional[str] = None
+    ):
+        self.file_path = file_path
+        self.member = member  # Archive member streamed from file_path, if any
+        self.sheet = sheet  # Worksheet read from file_path, if any
+        self.compression = compression  # Format file_path is decompressed from, if any
+        self.profile = profile
+        self.metrics = metrics or StageMetrics()
+        self._chunks = chunks
+        self._first_chunk: Optional[pd.DataFrame] = None
+        self._started = False
+        self._consumed = False
+
+    def peek(self) -> Optional[pd.DataFrame]:
+        """Returns the first chunk without consuming it."""
+        if not self._started:
+            self._first_chunk = self._next_chunk()
+            self._started = True
+        return self._first_chunk
+
+    def _next_chunk(self) -> Optional[pd.DataFrame]:
+        with self.metrics.stage('parse'):
+            return next(self._chunks, None)
+
+    @property
+    def splittable(self) -> bool:
+        """Whether byte offsets in file_path are offsets in the CSV text, so it can be sharded."""
+        return self.member is None and self.sheet is None and self.compression is None
+
+    @property
+    def columns(self) -> List[Any]:
+        """Header of the file as parsed."""
+        first_chunk = self.peek()
+        return list(first_chunk.columns) if first_chunk is not None else []
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self._consumed:
+            raise RuntimeError(f"Import source for {self.file_path} has already been consumed")
+        self._consumed = True
+
+        first_chunk = self.peek()
+        self._first_chunk = None
+        while first_chunk is not None:
+            yield first_chunk
+            first_chunk = self._next_chunk()
+
+
 class CSVProcessor:
     CHUNK_SIZE = 10000
-    DEFAULT_COLUMNS = {
-        'create_date': datetime.now(),
-        'write_date': datetime.now(),
-        'create_uid': 1,
-        'write_uid': 1
-    }
 
     def __init__(self, table_name: str):
         self.table_name = table_name
-        self.engine = create_engine(
-            f'postgresql://{settings.DATABASES["default"]["USER"]}:'
-            f'{settings.DATABASES["default"]["PASSWORD"]}@'
-            f'{settings.DATABASES["default"]["HOST"]}/'
-            f'{settings.DATABASES["default"]["NAME"]}'
-        )
-        self.csv_to_db_column_map = {
-            "Employee Name": "name",
-            "IPPIS Number": "ippis_number",
-            "NSCDC Number": "nscdc_number",
-            "ORACLE Number": "oracle_number",
-            "EMP Number": "emp_number",
-            "NPF Number": "npf_number",
-            "NCS Number": "ncs_number",
-            "PR Number": "pr_number",
-            "TI Number": "ti_number",
-            "PF Number": "pf_number",
-            "FCT Number": "fct_number",
-            "BVN": "bvn",
-            "RankName": "rank_name",
-            "GradeLevel": "grade_level",
-            "Step": "step",
-            "Department": "department",
-            "MDA": "mda",
-            "Gender": "gender",
-            "DateofFirstAppt": "date_of_first_application",
-            "Birthdate": "birthdate",
-            "BankName": "bank_name",
-            "BankCode": "bank_code",
-            "BranchName": "branch_name",
-            "AccountNumber": "account_number",
-            "NetPayment": "net_payment",
-            "CivilServantCategory": "civil_servant_type_id",
-            "Net Payment Month": "net_payment_month",
-            "Email Address": "net_payment_month",
-        }
-        self.loan_details_column_map = {
-            "Tenor": "loan_tenor",
-            "LOAN TYPE": "loan_type",
-            "NSCDC NO": "nscdc_no",
-            "NAME": "name",
-            "ACCT NO": "account_no",
-            "Initiated By": "initiated_by",
-            "Relation Officer": "relation_officer",
-            "BANK": "bank",
-            "CODE": "code",
-            0.01: "one_percent",
-            0.015: "one_five_percent",
-            "Disbursement Date": "disbursement_dates",
-            "OLD LOAN": "old_loan_amount",
-            "NEW LOAN": "new_loan_amount",
-            "DISB AMOUNT": "disbursement_amount",
-            "LOAN BALANCE": "loan_balance",
-            "IPPIS Number": "ippis_number",
-            "Emp Number": "emp_number",
-            "NPF Number": "npf_number",
-            "NCS Number": "ncs_number",
-            "PR Number": "pr_number",
-            "TI Number": "ti_number",
-            "FCT Number": "fct_number",
-            "PF Number": "pf_number",
-            "Oracle Number": "oracle_number",
-        }
-        self.repayment_column_map = {
-            "IPPIS NO": "ippis_no",
-            "Employee Name": "employee_name",
-            "Year": "year",
-            "Amount": "amount",
-            "Product": "product_id",
-            "Month": "month_field",
-            "New PSN": "new_psn",
-            "Old PSN": "old_psn",
-            "Employee Number": "employee_no",
-            "Staff ID": "staff_id",
-            "Legacy ID": "legacy_id",
-            "Full Name": "full_name",
-            "Element": "element",
-            "Period": "period",
-            "Command": "command",
-            "Staff Number": "staff_number",
-            "Staff Name": "staff_name",
-            "Loan Type": "loan_type",
-            "Service Number": "service_number",
-            "Pencom ID": "pencom_id",
-            "Account ID": "account_id",
-            "Bank Code": "bank_code",
-            "Beneficiary": "beneficiary",
-            "Element Name": "element_name",
-            "NHF Number": "nhf_number",
-            "Employee Number": "employee_number",
-            "IPPIS Number": "ippis_number",
-            "Name": "name",
-            "Period Name": "period_name",
-            "WACS Creditors Name": "wacs_creditors_name",
-            "Ministry Name": "ministry_name",
-            "Value Data": "value_data",
-            "Narration": "narration",
-            "Loan Amount": "loan_amount",
-            "Deduction": "deduction",
-            "WACS Monthly Deduction Amount": "wacs_monthly_deduction_amount",
-            "NSCDC Number": "nscdc_no",
-            "Oracle Number": "oracle_number",
-            "EMP Number": "emp_number",
-            "NPF Number": "npf_number",
-            "NCS Number": "ncs_number",
-            "PR Number": "pr_number",
-            "TI Number": "ti_number",
-            "FCT Number": "fct_number",
-            "PF Number": "pf_number"
-        }
-        self.LOAN_TYPE_MAPPING = {
-            'RENEWAL': 'renewal',
-            'NEWLOAN': 'new_loan',
-            'TOPUP': 'top_up',
-            'LOANCOMPLETED': 'completed_loan',
-            'RENEWAL ': 'renewal',
-            'NEWLOAN ': 'new_loan',
-            'TOPUP ': 'top_up',
-            'LOANCOMPLETED ': 'completed_loan',
-            ' RENEWAL': 'renewal',
-            ' NEWLOAN': 'new_loan',
-            ' TOPUP': 'top_up',
-            ' LOANCOMPLETED': 'completed_loan',
-            'NEW LOAN': 'new_loan',
-            'TOP UP': 'top_up',
-            'COMPLETED LOAN': 'completed_loan'
-        }
-    
-    @staticmethod
-    def safe_convert(x, column_name=None):
-        try:
-            # Handle None, NaN, or empty values
-            if pd.isna(x) or x is None or str(x).strip() == '':
-                if column_name == 'loan_tenor':
-                    return 0
-                return 0.00
-                
-            # Convert to string and remove commas and currency symbols
-            x_str = str(x).strip().replace(',', '').replace('₦', '').replace('$', '')
-                
-            # Handle conversion  to appropriate type (int or float)
-            if column_name == 'loan_tenor':
-                # Ensure conversion to integer
-                return int(x_str) if x_str.isdigit() else 0
-            # Convert to float
-            return float(x_str)
-            
-        except (ValueError, TypeError) as e:
-            logger.error(f"Conversion error for value '{x}': {e}")
-            return 0.00 if column_name != 'loan_tenor' else 0
-        
+        self.plan = get_plan(table_name)
+        self.engine = get_engine()
+        self.file_profile: Optional[FileProfile] = None
+        self.numeric_failures: Dict[str, int] = {}
+        self.decode_replacements = 0
+        self.date_parser = DateParser()
+        self.metrics = StageMetrics()
+        self.rows_loaded = 0
+        self.rows_rejected = 0
+        self.validation = RuleSet(self.plan.validation_rules)
+
     def _rename_columns(self, chunk: pd.DataFrame) -> pd.DataFrame:
-        """Renames columns based on the CSV to DB mapping and handles data normalization."""
-            # Select the appropriate column mapping
-        if self.table_name == 'loan_details':
-            column_map = self.loan_details_column_map
-        elif self.table_name == 'repayment':
-            column_map = self.repayment_column_map
-        else:
-            column_map = self.csv_to_db_column_map
-            
-        # First, rename columns
-        chunk.rename(columns=column_map, inplace=True)
-        # chunk.rename(columns=self.csv_to_db_column_map, inplace=True)
-        
-        # Float columns that need special handling
-        numeric_columns = [
-            'loan_amount', 
-            'deduction', 
-            'wacs_monthly_deduction_amount',
-            'amount',
-            'old_loan_amount',
-            'new_loan_amount',
-            'one_percent',
-            'one_five_percent',
-            'disbursement_amount',
-            'insurance',
-            'admin_fee',
-            'loan_balance',
-            'preliquidation_fee'
-        ]
-        
-        logger.info(f"Data types before insertion: {chunk.dtypes}")
-        
-        # Detailed numeric column conversion
-        for col in numeric_columns:
-            if col in chunk.columns:
-                try:
-                    # Log original column info
-                    logger.info(f"\nProcessing column: {col}")
-                    logger.info(f"Column dtype before conversion: {chunk[col].dtype}")
-                    logger.info(f"Sample values before conversion: {chunk[col].head()}")
-                    
-                    # Apply safe conversion
-                    # chunk[col] = chunk[col].apply(safe_convert)
-                    chunk[col] = chunk[col].apply(lambda x: self.safe_convert(x, column_name=col))
-                
-                    # Log column info after conversion
-                    logger.info(f"Column dtype after conversion: {chunk[col].dtype}")
-                    logger.info(f"Sample values after conversion: {chunk[col].head()}")
-                    logger.info(f"Unique values after conversion: {chunk[col].unique()}")
-                
-                except Exception as e:
-                    logger.error(f"Unexpected error processing column {col}: {e}")
-                    # Re-raise the exception to prevent further processing
-                    raise
-                
-        MONTH_TO_NUMBER = {
-            'January': '01',
-            'February': '02',
-            'March': '03',
-            'April': '04',
-            'May': '05',
-            'June': '06',
-            'July': '07', 
-            'August': '08',
-            'September': '09',
-            'October': '10',
-            'November': '11',
-            'December': '12'
-        }
-
-        if 'month_field' in chunk.columns:
-            # Convert month names to two-digit numbers with error logging
-            def convert_month(month):
-                try:
-                    return MONTH_TO_NUMBER.get(month, month)
-                except Exception as e:
-                    logger.warning(f"Unable to convert month '{month}': {e}")
-                    return month
-            
-            chunk['month_field'] = chunk['month_field'].apply(convert_month)
-
-        # Handle disbursement_dates only for loan_details table
-        if self.table_name == 'loan_details':
-            if 'disbursement_dates' in chunk.columns:
-                # Replace empty strings with None
-                chunk['disbursement_dates'] = chunk['disbursement_dates'].replace('', None)
-
-                # Clean and convert dates
-                def clean_date(date_str):
-                    if pd.isna(date_str) or date_str is None or str(date_str).strip() == '':
-                        return None
-                    try:
-                        parsed_date = pd.to_datetime(str(date_str).strip(), errors='coerce')
-                        return parsed_date.date() if not pd.isna(parsed_date) else None
-                    except Exception as e:
-                        logger.warning(f"Error converting date '{date_str}': {str(e)}")
-                        return None
-
-                chunk['disbursement_dates'] = chunk['disbursement_dates'].apply(clean_date)
-                logger.info(f"Disbursement dates after cleaning: {chunk['disbursement_dates'].unique()}")
-            else:
-                logger.warning(f"Column 'disbursement_dates' not found in chunk for table {self.table_name}.")
-
-        # Handle loan type mapping for loan_details table
-        if self.table_name == 'loan_details':
-            # First ensure the column is renamed properly
-            if 'LOAN TYPE' in chunk.columns:
-                chunk.rename(columns={'LOAN TYPE': 'loan_type'}, inplace=True)
-            
-            # Then map the values to the correct format
-            if 'loan_type' in chunk.columns:
-                def map_loan_type(value):
-                    if pd.isna(value) or value is None or str(value).strip() == '':
-                        return 'new_loan'  # default value
-                    cleaned_value = str(value).strip().upper()
-                    mapped_value = self.LOAN_TYPE_MAPPING.get(cleaned_value)
-                    if mapped_value is None:
-                        logger.warning(f"Unknown loan type value: {value}")
-                        return 'new_loan'
-                    return mapped_value
-
-                # Apply the mapping
-                chunk['loan_type'] = chunk['loan_type'].apply(map_loan_type)
-                
-                # Log the unique values after mapping to verify
-                logger.info(f"Unique loan types after mapping: {chunk['loan_type'].unique()}")
-            
-        # Normalize Gender column
-        if 'gender' in chunk.columns:
-            # Create a mapping for gender normalization
-            gender_mapping = {
-                # Case-insensitive mappings for various ways "Male" might be written
-                'male': 'male',
-                'm': 'male',
-                'Male': 'male',
-                'M': 'male',
-                
-                # Case-insensitive mappings for various ways "Female" might be written
-                'female': 'female',
-                'f': 'female',
-                'Female': 'female',
-                'F': 'female'
-            }
-            
-            # Apply gender normalization
-            chunk['gender'] = chunk['gender'].map(gender_mapping)
-            
-            # Optional: Log any unmatched gender values
-            unmatched_genders = chunk.loc[chunk['gender'].isna(), 'gender'].unique()
-            if len(unmatched_genders) > 0:
-                logger.warning(f"Unmatched gender values found: {unmatched_genders}")
-        
-        # Existing category mapping logic
-        if 'civil_servant_type_id' in chunk.columns:
-            try:
-                # Create a mapping of category names to IDs
-                with self.engine.connect() as conn:
-                    category_mapping = pd.read_sql(
-                        "SELECT id, name FROM civil_servant_category", 
-                        conn
-                    )
-                    
-                    # Create a dictionary mapping category names to IDs
-                    name_to_id = dict(zip(
-                        category_mapping['name'].str.strip().str.lower(), 
-                        category_mapping['id']
-                    ))
-                    
-                    # Replace category names with their corresponding IDs
-                    chunk['civil_servant_type_id'] = chunk['civil_servant_type_id'].str.strip().str.lower().map(name_to_id)
-                    
-                    # Log unmatched categories
-                    unmatched = chunk.loc[chunk['civil_servant_type_id'].isna(), 'civil_servant_type_id'].unique()
-                    if len(unmatched) > 0:
-                        logger.warning(f"Unmatched categories: {unmatched}")
-            except Exception as e:
-                logger.error(f"Error mapping civil servant categories: {e}")
-        
-        # Map Product_id to the correct product_id
-        if 'product_id' in chunk.columns:
+        """Renames columns with the table's column map and normalizes mapped values."""
+        chunk.rename(columns=self.plan.column_map, inplace=True)
+
+        for value_map in self.plan.value_maps:
+            if value_map.column in chunk.columns:
+                chunk[value_map.column], unmatched = value_map.apply(chunk[value_map.column])
+                if unmatched and not value_map.keep_unmatched:
+                    logger.warning(f"Unmatched {value_map.column} values found: {unmatched}")
+
+        return chunk
+
+    def _map_lookups(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Replaces category and product names with ids from the reference tables."""
+        for lookup_column in self.plan.lookups:
+            if lookup_column.column not in chunk.columns:
+                continue
             try:
-                with self.engine.connect() as conn:
-                    # Create a mapping of product names/codes to IDs
-                    product_mapping = pd.read_sql(
-                        "SELECT id, name, code FROM repayment_product", 
-                        conn
-                    )
-                    
-                    # Create dictionaries for mapping
-                    name_to_id = dict(zip(
-                        product_mapping['name'].str.strip().str.lower(), 
-                        product_mapping['id']
-                    ))
-                    code_to_id = dict(zip(
-                        product_mapping['code'].str.strip().str.lower(), 
-                        product_mapping['id']
-                    ))
-                    
-                    # Try to map using name first, then code
-                    chunk['product_id'] = chunk['product_id'].apply(lambda x: 
-                        name_to_id.get(str(x).strip().lower()) or 
-                        code_to_id.get(str(x).strip().lower()) or 
-                        x
-                    )
-                    
-                    # Log unmatched products
-                    unmatched = chunk.loc[chunk['product_id'].isna() | (chunk['product_id'] == chunk['product_id'].astype(str)), 'product_id'].unique()
-                    if len(unmatched) > 0:
-                        logger.warning(f"Unmatched Products: {unmatched}")
-            
+                lookup = get_lookup(self.engine, lookup_column.table)
+                chunk[lookup_column.column], unmatched = map_lookup(
+                    chunk[lookup_column.column], lookup, keep_unmatched=lookup_column.keep_unmatched
+                )
+                if unmatched:
+                    logger.warning(f"Unmatched {lookup_column.table} values: {unmatched}")
             except Exception as e:
-                logger.error(f"Error mapping product categories: {e}")
-        
+                logger.error(f"Error mapping {lookup_column.column} from {lookup_column.table}: {e}")
+
         return chunk
-    
+
     def validate_table_schema(self) -> bool:
         """Validates the required columns exist in the target table."""
         try:
@@ -398,209 +141,274 @@ class CSVProcessor:
                     "WHERE table_name = :table_name"
                 ), {"table_name": self.table_name})
                 columns: List[str] = [row[0] for row in result]
-                
-                # Choose the appropriate column mapping based on table name
-                if self.table_name == 'repayment':
-                    mapped_columns = list(self.repayment_column_map.values())
-                elif self.table_name == 'loan_details':
-                    mapped_columns = list(self.loan_details_column_map.values())
-                else:
-                    mapped_columns = list(self.csv_to_db_column_map.values())
-                
-                # Add default columns
-                required_columns = ['create_date', 'write_date', 'create_uid', 'write_uid'] + mapped_columns
-                
+
                 # Check which required columns are missing
-                missing_columns = [col for col in required_columns if col not in columns]
-                
+                missing_columns = [col for col in self.plan.required_columns if col not in columns]
+
                 if missing_columns:
                     logger.error(f"Missing columns for {self.table_name}: {missing_columns}")
                     logger.error(f"Existing columns: {columns}")
                     return False
-                
+
                 return True
         except Exception as e:
             logger.error(f"Schema validation error for {self.table_name}: {str(e)}")
             return False
 
-    def read_file(self, file_path: str) -> pd.DataFrame:
-        """Reads CSV or Excel files with robust handling."""
-        try:
-            # Check file extension
-            if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                # Read Excel file
-                return pd.read_excel(
-                    file_path, 
-                    dtype=str,  
-                    engine='openpyxl'  
-                )
+    def open_source(self, file_path: str, profile: Optional[FileProfile] = None) -> ImportSource:
+        """Opens a file for a single chunked parse shared by all pipeline steps.
+
+        A profile captured at upload time skips the detection pass. ZIP
+        archives are read from their first CSV member, and gzip, bz2, xz and
+        zstd files (recognised by their magic numbers) are decompressed as
+        they are parsed.
+        """
+        if is_archive(file_path):
+            return self.open_member_source(file_path, csv_members(file_path)[0])
+
+        compression = None if self._is_excel(file_path) else detect_compression(file_path)
+        if compression is not None:
+            if profile is None:
+                with self.metrics.stage('detection'):
+                    profile = detect_compressed_profile(file_path, compression)
+            return ImportSource(
+                file_path, self._iter_compressed_chunks(file_path, compression, profile), profile, self.metrics,
+                compression=compression
+            )
 
-            if file_path.endswith('.zip'):
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    zip_ref.extractall('/tmp/extracted_files')
-                    extracted_file = zip_ref.namelist()[0]
-                    extracted_file_path = f'/tmp/extracted_files/{extracted_file}'
-                    return self._read_csv_with_robust_parsing(extracted_file_path)
-            
-            # Normal CSV processing
-            return self._read_csv_with_robust_parsing(file_path)
+        if self._is_excel(file_path):
+            return ImportSource(file_path, self._iter_excel_chunks(file_path), None, self.metrics)
 
-        except Exception as e:
-            logger.error(f"File reading error: {str(e)}")
-            raise e
-
-    def _read_csv_with_robust_parsing(self, file_path: str) -> pd.DataFrame:
-        """Advanced CSV reading with multiple fallback strategies."""
-        # First, detect file encoding
-        file_encoding = self._detect_file_encoding(file_path)
-        
-        # Try reading with different parsing strategies
-        parsing_strategies = [
-            self._standard_csv_read,
-            self._flexible_csv_read,
-            self._raw_text_csv_read
-        ]
-        
-        for strategy in parsing_strategies:
-            try:
-                df = strategy(file_path, file_encoding)
-                if not df.empty:
-                    return df
-            except Exception as e:
-                logger.warning(f"Parsing strategy failed: {strategy.__name__}: {str(e)}")
-        
-        raise ValueError("Could not parse the CSV file with any available strategy")
+        if profile is None:
+            with self.metrics.stage('detection'):
+                profile = detect_file_profile(file_path)
+        return ImportSource(file_path, self._iter_csv_chunks(file_path, profile), profile, self.metrics)
 
-    def _detect_file_encoding(self, file_path: str) -> str:
-        """Detect file encoding using chardet with fallback."""
+    def open_sheet_source(self, file_path: str, sheet: str) -> ImportSource:
+        """Opens one worksheet of an Excel workbook as a source."""
+        return ImportSource(file_path, self._iter_excel_chunks(file_path, sheet), None, self.metrics, sheet=sheet)
+
+    @staticmethod
+    def excel_sheet_names(file_path: str, selection: List[str]) -> List[str]:
+        """Resolves a sheet selection against a workbook; ['*'] selects every sheet."""
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
         try:
-            with open(file_path, 'rb') as file:
-                raw_data = file.read()
-                result = chardet.detect(raw_data)
-                
-            # Prioritize detected encoding, with fallbacks
-            encodings = [
-                result['encoding'] or 'utf-8', 
-                'utf-8', 
-                'latin1', 
-                'ISO-8859-1', 
-                'cp1252'
-            ]
-            
-            return next(enc for enc in encodings if enc)
-        except Exception as e:
-            logger.error(f"Encoding detection error: {str(e)}")
-            return 'utf-8'  # Safe default
+            names = workbook.sheetnames
+        finally:
+            workbook.close()
+
+        if selection == ['*']:
+            return names
+        missing = [name for name in selection if name not in names]
+        if missing:
+            raise ValueError(f"Sheets not found in workbook: {', '.join(missing)}")
+        return selection
+
+    def open_member_source(self, file_path: str, member: str) -> ImportSource:
+        """Opens one member of a ZIP archive as a source, decompressing it as it is parsed."""
+        with self.metrics.stage('detection'):
+            profile = detect_member_profile(file_path, member)
+        return ImportSource(
+            file_path, self._iter_member_chunks(file_path, member, profile), profile, self.metrics, member=member
+        )
 
-    def _standard_csv_read(self, file_path: str, encoding: str) -> pd.DataFrame:
-        """CSV reading that never fails, preserving all rows."""
+    def _iter_compressed_chunks(self, file_path: str, compression: str, profile: FileProfile) -> Iterator[pd.DataFrame]:
+        with DecompressedStream(file_path, compression) as stream:
+            yield from self._iter_csv_chunks(stream, profile)
+
+    def _iter_member_chunks(self, file_path: str, member: str, profile: FileProfile) -> Iterator[pd.DataFrame]:
+        with MemberStream(file_path, member) as stream:
+            yield from self._iter_csv_chunks(stream, profile)
+
+    def open_shard_source(self, file_path: str, start: int, end: int, profile: FileProfile) -> ImportSource:
+        """Opens the byte range [start, end) of a CSV file, with its header, as a source."""
+        return ImportSource(file_path, self._iter_shard_chunks(file_path, start, end, profile), profile, self.metrics)
+
+    def _iter_shard_chunks(self, file_path: str, start: int, end: int, profile: FileProfile) -> Iterator[pd.DataFrame]:
+        shard = open_shard(file_path, start, end)
         try:
-            return pd.read_csv(
-                file_path,
-                encoding=encoding,
-                quotechar='"',
-                thousands=',',
-                dtype=str,  
-                on_bad_lines='warn', 
-                low_memory=False
-            )
-        except Exception as e:
-            logger.warning(f"CSV read failed: {str(e)}")
-            # Fallback reading strategies
-            try:
-                # Try with Python engine and alternative delimiters
-                delimiters = [',', ';', '\t', '|']
-                for delimiter in delimiters:
-                    try:
-                        return pd.read_csv(
-                            file_path,
-                            encoding=encoding,
-                            sep=delimiter,
-                            dtype=str,
-                            on_bad_lines='warn',
-                            engine='c'
-                        )
-                    except Exception as inner_e:
-                        logger.warning(f"Delimiter {delimiter} failed: {str(inner_e)}")
-                
-                # Absolute last resort: raw text reading
-                with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                    content = f.read()
-                    return pd.read_csv(
-                        io.StringIO(content),
-                        dtype=str,
-                        on_bad_lines='warn',
-                        engine='c'
+            yield from self._iter_csv_chunks(shard, profile)
+        finally:
+            shard.close()
+
+    @staticmethod
+    def _is_excel(file_path: str) -> bool:
+        return file_path.endswith('.xlsx') or file_path.endswith('.xls')
+
+    def _iter_csv_chunks(self, file_path: Union[str, IO[bytes]], profile: FileProfile) -> Iterator[pd.DataFrame]:
+        """Streams a CSV file in chunks with the dialect decided by detection.
+
+        Bytes the detected encoding cannot decode are replaced with U+FFFD
+        and counted in decode_replacements.
+        """
+        with pd.read_csv(
+            file_path,
+            dtype=str,
+            on_bad_lines='warn',
+            chunksize=self.CHUNK_SIZE,
+            **profile.read_csv_options()
+        ) as reader:
+            replaced = replaced_bytes()
+            for chunk in reader:
+                if replaced_bytes() > replaced:
+                    logger.warning(
+                        f"Replaced {replaced_bytes() - replaced} bytes that are not valid {profile.encoding}"
                     )
-            except Exception as final_e:
-                logger.error(f"Catastrophic file read failure: {str(final_e)}")
-                # Create an empty DataFrame to prevent total failure
-                return pd.DataFrame()
-
-
-    def _flexible_csv_read(self, file_path: str, encoding: str) -> pd.DataFrame:
-        """More flexible CSV reading with additional parsing options."""
-        return self._standard_csv_read(file_path, encoding)
-
-    def _raw_text_csv_read(self, file_path: str, encoding: str) -> pd.DataFrame:
-        """Last resort: read file as raw text and parse manually."""
-        return self._standard_csv_read(file_path, encoding)
-    
-    def process_file(self, file_path: str, import_log_id: int) -> bool:
-        """Processes the CSV file in chunks and inserts data into the database."""
+                    self.decode_replacements += replaced_bytes() - replaced
+                    replaced = replaced_bytes()
+                yield chunk
+
+    def _iter_excel_chunks(self, file_path: str, sheet: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Streams a worksheet (the active one by default) in chunks using openpyxl's read-only mode."""
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet is not None else workbook.active
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+
+            columns = [
+                name if name is not None else f'Unnamed: {index}'
+                for index, name in enumerate(header)
+            ]
+            width = len(columns)
+
+            batch: List[List[Optional[str]]] = []
+            for row in rows:
+                if all(cell is None for cell in row):
+                    continue
+                values = [self._excel_cell_to_str(cell) for cell in row[:width]]
+                values.extend([None] * (width - len(values)))
+                batch.append(values)
+
+                if len(batch) >= self.CHUNK_SIZE:
+                    yield pd.DataFrame(batch, columns=columns)
+                    batch = []
+
+            if batch:
+                yield pd.DataFrame(batch, columns=columns)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _excel_cell_to_str(cell: Any) -> Optional[str]:
+        """Converts an Excel cell value to the string pandas' read_excel(dtype=str) would produce."""
+        if cell is None:
+            return None
+        if isinstance(cell, float) and cell.is_integer():
+            return str(int(cell))
+        return str(cell)
+
+    def process_file(
+        self,
+        source: Union[str, ImportSource],
+        import_log_id: int,
+        increment_progress: bool = False,
+        shard: int = 0
+    ) -> bool:
+        """Processes the file in chunks and inserts each chunk into the database.
+
+        Each chunk is committed in the same transaction as the import's
+        checkpoint, so a retried or resumed import skips the chunks already
+        committed instead of inserting them again. With increment_progress,
+        each chunk adds to successful_records instead of overwriting it, so
+        several shards can report into one ImportLog.
+
+        A chunk the database rejects is retried in halves down to single
+        rows, so only the offending rows are left out. They are written to
+        the import's reject file and counted in failed_records.
+
+        With IMPORT_TRANSFORM_WORKERS set, chunks are transformed in a
+        TransformPool while this process keeps parsing and loading.
+        """
+        loader = None
+        pool = None
         try:
-            total_processed = 0
-            data = self.read_file(file_path)  # Read the file
-            
-            logger.info(f"Total rows read: {len(data)}")
-            logger.info(f"Original Columns: {list(data.columns)}")
-            
-            # Rename columns based on the mapping
-            data = self._rename_columns(data)
-            
-            logger.info(f"Renamed Columns: {list(data.columns)}")
-            
+            if isinstance(source, str):
+                source = self.open_source(source)
+            self.file_profile = source.profile
+
+            loader = get_loader(self.engine, self.table_name)
+            logger.info(f"Loading {self.table_name} with the {loader.name} loader")
+            if settings.IMPORT_TRANSFORM_WORKERS > 0:
+                pool = TransformPool(
+                    self.table_name, self.file_profile, settings.IMPORT_TRANSFORM_WORKERS,
+                    ordered=settings.IMPORT_TRANSFORM_ORDERED
+                )
+
             with self.engine.connect() as conn:
-                # Clean the entire dataframe
-                data = self._clean_chunk(data)
-
-                logger.info(f"Cleaned Columns: {list(data.columns)}")
-                logger.info(f"Cleaned Data Sample:\n{data.head()}")
-                if self.table_name == 'loan_details':
-                    logger.info(f"Data sample before insertion:\n{data[['loan_type', 'disbursement_dates']].head()}")
-                    logger.info(f"Disbursement dates before insertion: {data['disbursement_dates'].unique()}")
-            
-                # Only log loan_type and disbursement_dates for loan_details table
-                if self.table_name == 'loan_details':
-                    if 'loan_type' in data.columns:
-                        logger.info(f"Loan types before insertion: {data['loan_type'].unique()}")
-
-                    if 'disbursement_dates' in data.columns:
-                        data['disbursement_dates'] = data['disbursement_dates'].replace('', None)
-                        data.loc[data['disbursement_dates'] == '', 'disbursement_dates'] = None
-                        logger.info(f"Disbursement d`ates unique values: {data['disbursement_dates'].unique()}")
-
-                # Bulk insert
-                try:
-                    data.to_sql(
-                        self.table_name,
-                        self.engine,
-                        if_exists='append',
-                        index=False,
-                        method='multi'
+                chunks_committed, chunks_ahead, total_processed = self._load_checkpoint(conn, import_log_id, shard)
+                conn.commit()
+                self.rows_loaded = total_processed
+                if chunks_committed or chunks_ahead:
+                    logger.info(
+                        f"Resuming import {import_log_id} (shard {shard}) after chunk {chunks_committed} "
+                        f"({total_processed} rows already committed)"
                     )
-                    logger.info(f"Successfully inserted {len(data)} rows")
-                    total_processed = len(data)
-                    self._update_progress(conn, import_log_id, total_processed)
-                    return True
-                except Exception as insert_error:
-                    logger.error(f"Insertion error: {insert_error}")
-                    logger.error(f"Problematic data columns:\n{data.columns}")
-                    logger.error(f"Problematic data sample:\n{data.head()}")
-                    
-                    with self.engine.connect() as error_conn:
-                        self._update_error(error_conn, import_log_id, str(insert_error))
-                    return False
+
+                pending = self._pending_chunks(source, chunks_committed, frozenset(chunks_ahead))
+                for chunk_number, chunk, invalid in self._transform_chunks(pending, pool):
+                    if chunk_number == 1:
+                        logger.info(f"Cleaned Columns: {list(chunk.columns)}")
+                        logger.info(f"Cleaned Data Sample:\n{chunk.head()}")
+
+                    # Bulk insert, committed together with the checkpoint and progress
+                    try:
+                        # Rows failing validation are quarantined like rows the database rejects
+                        rejects = invalid
+                        load_chunk = chunk.drop(index=[position for position, _ in invalid]) if invalid else chunk
+                        with self.metrics.stage('insert'):
+                            inserted, updated, load_rejects = self._load_isolating_rejects(
+                                loader, load_chunk, conn, import_log_id, len(invalid)
+                            )
+                        if load_rejects:
+                            rejects = sorted(
+                                rejects + [(int(load_chunk.index[offset]), error) for offset, error in load_rejects]
+                            )
+                        accepted = len(chunk) - len(rejects)
+                        committed, ahead = self._advance_checkpoint(chunks_committed, chunks_ahead, chunk_number)
+                        with self.metrics.stage('progress_update'):
+                            self._save_checkpoint(
+                                conn, import_log_id, shard, committed, ahead, total_processed + accepted
+                            )
+                            if increment_progress:
+                                self._increment_progress(conn, import_log_id, accepted)
+                            else:
+                                self._update_progress(conn, import_log_id, total_processed + accepted)
+                            self._record_load_counts(conn, import_log_id, inserted, updated)
+                            if rejects:
+                                self._record_rejects(conn, import_log_id, len(rejects), reject_file_path(import_log_id, shard))
+                            conn.commit()
+                    except Exception as insert_error:
+                        conn.rollback()
+                        logger.error(f"Insertion error in chunk {chunk_number}: {insert_error}")
+                        logger.error(f"Problematic data columns:\n{chunk.columns}")
+                        logger.error(f"Problematic data sample:\n{chunk.head()}")
+                        self._update_error(conn, import_log_id, str(insert_error))
+                        return False
+
+                    if rejects:
+                        # Written after the commit, so a retried chunk never writes its rejects twice
+                        first_row = (chunk_number - 1) * self.CHUNK_SIZE + 1
+                        write_rejects(reject_file_path(import_log_id, shard), chunk, rejects, first_row, shard)
+                        self.rows_rejected += len(rejects)
+                        logger.warning(f"Rejected {len(rejects)} rows of chunk {chunk_number}")
+
+                    chunks_committed, chunks_ahead = committed, ahead
+                    total_processed += accepted
+                    self.rows_loaded = total_processed
+                    logger.info(f"Inserted chunk {chunk_number} ({accepted} rows, {total_processed} total)")
+
+            logger.info(f"Successfully inserted {total_processed} rows")
+            if self.validation.rows_invalid:
+                logger.warning(f"Validation failures per rule: {self.validation.summary}")
+            self.metrics.log_summary()
+            if self.numeric_failures:
+                logger.warning(f"Unparseable numeric values per column: {self.numeric_failures}")
+            if self.decode_replacements:
+                logger.warning(f"Undecodable bytes replaced: {self.decode_replacements}")
+            return True
 
         except Exception as e:
             logger.error(f"File processing error: {str(e)}")
@@ -608,107 +416,262 @@ class CSVProcessor:
                 self._update_error(conn, import_log_id, str(e))
             return False
 
+        finally:
+            if pool is not None:
+                pool.close()
+            if loader is not None:
+                loader.close()
+
+    def transform_chunk(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[Reject]]:
+        """Renames, maps, validates and cleans a parsed chunk.
+
+        Returns the chunk with a fresh index and the (position, error) of
+        the rows to quarantine for failing validation.
+        """
+        with self.metrics.stage('rename'):
+            chunk = self._rename_columns(chunk)
+        with self.metrics.stage('lookup_mapping'):
+            chunk = self._map_lookups(chunk)
+        with self.metrics.stage('validate'):
+            invalid = self._validate_chunk(chunk)
+        with self.metrics.stage('clean'):
+            chunk = self._clean_chunk(chunk)
+        return chunk.reset_index(drop=True), invalid
+
+    @staticmethod
+    def _pending_chunks(
+        source: ImportSource,
+        chunks_committed: int,
+        chunks_ahead: FrozenSet[int]
+    ) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """Numbers the chunks of a source, skipping those a previous attempt committed."""
+        for chunk_number, chunk in enumerate(source, start=1):
+            if chunk_number <= chunks_committed or chunk_number in chunks_ahead:
+                continue
+            if chunk_number == 1:
+                logger.info(f"Original Columns: {list(chunk.columns)}")
+            yield chunk_number, chunk
+
+    def _transform_chunks(
+        self,
+        chunks: Iterator[Tuple[int, pd.DataFrame]],
+        pool: Optional[TransformPool]
+    ) -> Iterator[Tuple[int, pd.DataFrame, List[Reject]]]:
+        """Transforms numbered chunks in this process, or in the pool's workers when one is given."""
+        if pool is None:
+            for chunk_number, chunk in chunks:
+                yield (chunk_number, *self.transform_chunk(chunk))
+            return
+
+        results = pool.map(chunks)
+        while True:
+            # Time spent parsing and waiting on the workers
+            with self.metrics.stage('transform_pool'):
+                result = next(results, None)
+            if result is None:
+                return
+            self.metrics.merge(result.stages)
+            self.validation.merge(result.validation_report)
+            for col, count in result.numeric_failures.items():
+                self.numeric_failures[col] = self.numeric_failures.get(col, 0) + count
+            yield result.number, result.chunk, result.invalid
+
+    @staticmethod
+    def _advance_checkpoint(chunks_committed: int, chunks_ahead: List[int], chunk_number: int) -> Tuple[int, List[int]]:
+        """Returns the checkpoint after committing a chunk.
+
+        That is the unbroken run of chunks committed from the start, plus the
+        chunks committed past it when transforms are delivered out of order.
+        """
+        ahead = set(chunks_ahead)
+        ahead.add(chunk_number)
+        while chunks_committed + 1 in ahead:
+            chunks_committed += 1
+            ahead.discard(chunks_committed)
+        return chunks_committed, sorted(ahead)
+
+    def _validate_chunk(self, chunk: pd.DataFrame) -> List[Reject]:
+        """Runs the table's validation rules; returns the rows to quarantine, if rejecting invalid rows."""
+        number_format = NumberFormat(
+            self.file_profile.thousands if self.file_profile else ',',
+            self.file_profile.decimal if self.file_profile else '.'
+        )
+        bitmap = self.validation.evaluate(chunk, number_format)
+        if settings.IMPORT_VALIDATION_MODE != 'reject' or not bitmap.any():
+            return []
+        return self.validation.errors(bitmap)
+
+    def _load_isolating_rejects(
+        self,
+        loader,
+        chunk: pd.DataFrame,
+        conn,
+        import_log_id: int,
+        invalid: int = 0
+    ) -> Tuple[int, int, List[Reject]]:
+        """Loads a chunk, bisecting batches the database rejects to isolate the bad rows.
+
+        Returns the rows inserted and updated and the (position, error) of
+        each rejected row. Errors that are not caused by row data, a chunk
+        in which every row fails, and imports over IMPORT_MAX_REJECTED_ROWS
+        still fail the chunk. The limit counts the import's failed_records,
+        so it covers every shard, member and resumed attempt, plus the
+        invalid rows this chunk already quarantined.
+        """
+        rejects: List[Reject] = []
+        inserted, updated = self._load_batch(loader, chunk, 0, conn, rejects)
+
+        if rejects and len(rejects) == len(chunk) > 1:
+            raise RuntimeError(f"Every row of the chunk was rejected, first error: {rejects[0][1]}")
+        rejected = invalid + len(rejects)
+        if rejected and self._failed_records(conn, import_log_id) + rejected > settings.IMPORT_MAX_REJECTED_ROWS:
+            last_error = f", last error: {rejects[-1][1]}" if rejects else ''
+            raise RuntimeError(f"More than {settings.IMPORT_MAX_REJECTED_ROWS} rows rejected{last_error}")
+        return inserted, updated, rejects
+
+    def _load_batch(self, loader, batch: pd.DataFrame, offset: int, conn, rejects: List[Reject]) -> Tuple[int, int]:
+        # Each attempt runs in a savepoint, so a failed batch leaves the chunk's transaction usable
+        savepoint = conn.begin_nested()
+        try:
+            loader.load(batch, conn)
+            savepoint.commit()
+            return loader.last_inserted, loader.last_updated
+        except Exception as e:
+            savepoint.rollback()
+            if not is_row_error(e):
+                raise
+            if len(batch) == 1:
+                rejects.append((offset, short_error(e)))
+                return 0, 0
+
+        middle = len(batch) // 2
+        first = self._load_batch(loader, batch.iloc[:middle], offset, conn, rejects)
+        second = self._load_batch(loader, batch.iloc[middle:], offset + middle, conn, rejects)
+        return first[0] + second[0], first[1] + second[1]
+
     def _clean_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
         """Cleans a chunk of data by stripping whitespace and handling empty values."""
-        # Ensure every value is a string and handle NaN values
-        chunk = chunk.astype(str)
-
-        # Replace NaN values with an empty string
-        chunk = chunk.fillna('')
-        
-        numeric_columns = [
-            'amount',
-            'loan_amount',
-            'deduction',
-            'wacs_monthly_deduction_amount',
-            'net_payment',
-            'old_loan_amount',
-            'new_loan_amount',
-            'one_percent',
-            'one_five_percent',
-            'disbursement_amount',
-            'insurance',
-            'admin_fee',
-            'loan_balance',
-            'preliquidation_fee',
-            'loan_tenor'
-        ]
-        
-        # Handle numeric columns first
-        for col in numeric_columns:
-            if col in chunk.columns:
-                # Special handling for loan_tenor to ensure it's an integer
-                if col == 'loan_tenor':
-                    # Convert loan_tenor to integer, replacing empty or invalid values with 0
-                    chunk[col] = chunk[col].apply(lambda x: self.safe_convert(x, column_name=col))
-                else:
-                    # For other numeric columns, convert empty strings and NaN to 0.0
-                    chunk[col] = pd.to_numeric(chunk[col].replace('', '0'), errors='coerce').fillna(0.0)
-    
+        plan = self.plan
+        # Convert numeric columns in one vectorized pass
+        thousands = self.file_profile.thousands if self.file_profile else ','
+        decimal = self.file_profile.decimal if self.file_profile else '.'
+        failures = clean_numeric_columns(
+            chunk, plan.numeric_columns, plan.integer_columns, thousands, decimal
+        )
+        if failures:
+            logger.warning(f"Unparseable numeric values replaced with 0: {failures}")
+            for col, count in failures.items():
+                self.numeric_failures[col] = self.numeric_failures.get(col, 0) + count
+
+        # Ensure every other value is a string, leaving mapped ids untouched
+        text_columns = [col for col in chunk.columns if col not in plan.non_text_columns]
+        chunk[text_columns] = chunk[text_columns].astype(str).fillna('')
+
         # Trim extreme whitespace
-        for col in chunk.columns:
-            if col not in numeric_columns:
-                chunk[col] = chunk[col].fillna('')
-                if chunk[col].dtype == 'object':
-                    chunk[col] = chunk[col].astype(str).str.strip()
-
-        # Handle disbursement_dates only for loan_details table
-        if self.table_name == 'loan_details':
-            if 'disbursement_dates' in chunk.columns:
-                chunk['disbursement_dates'] = chunk['disbursement_dates'].replace('', None)
-
-                def clean_date(date_str):
-                    if pd.isna(date_str) or date_str is None or str(date_str).strip() == '':
-                        return None
-                    try:
-                        parsed_date = pd.to_datetime(str(date_str).strip(), errors='coerce')
-                        return parsed_date.date() if not pd.isna(parsed_date) else None
-                    except Exception as e:
-                        logger.warning(f"Error converting date '{date_str}': {str(e)}")
-                        return None
+        for col in text_columns:
+            chunk[col] = chunk[col].str.strip()
 
-                chunk['disbursement_dates'] = chunk['disbursement_dates'].apply(clean_date)
+        for col in plan.date_columns:
+            if col in chunk.columns:
+                chunk[col], failed = self.date_parser.parse(chunk[col])
+                if failed:
+                    logger.warning(f"Unparseable {col} values replaced with NULL: {failed}")
             else:
-                logger.warning(f"Column 'disbursement_dates' not found in chunk for table {self.table_name}.")
-
-        # Select the appropriate column mapping
-        if self.table_name == 'loan_details':
-            expected_columns = list(self.loan_details_column_map.values())
-        elif self.table_name == 'repayment':
-            expected_columns = list(self.repayment_column_map.values())
-        else:
-            expected_columns = list(self.csv_to_db_column_map.values())
+                logger.warning(f"Column '{col}' not found in chunk for table {self.table_name}.")
 
         # Ensure all expected columns are present
-        for col in expected_columns:
+        for col, value in plan.missing_values.items():
             if col not in chunk.columns:
-                chunk[col] = 0.00 if col in numeric_columns else ''
+                chunk[col] = value
 
         # Add default columns if they don't exist
-        for col, value in self.DEFAULT_COLUMNS.items():
+        for col, value in plan.default_values().items():
             if col not in chunk.columns:
                 chunk[col] = value
 
         return chunk
 
     def _update_progress(self, conn, import_log_id: int, processed_records: int) -> None:
-        """Updates the progress of the import in the database."""
-        try:
-            conn.execute(text(
-                "UPDATE core_importlog "
-                "SET successful_records = :processed_records "
-                "WHERE id = :import_log_id"
-            ), {"processed_records": processed_records, "import_log_id": import_log_id})
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error updating progress: {str(e)}")
+        """Updates the progress of the import in the caller's transaction."""
+        conn.execute(text(
+            "UPDATE core_importlog "
+            "SET successful_records = :processed_records "
+            "WHERE id = :import_log_id"
+        ), {"processed_records": processed_records, "import_log_id": import_log_id})
+
+    def _increment_progress(self, conn, import_log_id: int, processed_records: int) -> None:
+        """Adds newly processed records to the progress of the import in the caller's transaction."""
+        conn.execute(text(
+            "UPDATE core_importlog "
+            "SET successful_records = successful_records + :processed_records "
+            "WHERE id = :import_log_id"
+        ), {"processed_records": processed_records, "import_log_id": import_log_id})
+
+    def _record_rejects(self, conn, import_log_id: int, rejected: int, reject_file: str) -> None:
+        """Adds rejected rows to failed_records and links the reject file, in the caller's transaction."""
+        conn.execute(text(
+            "UPDATE core_importlog "
+            "SET failed_records = failed_records + :rejected, reject_file = :reject_file "
+            "WHERE id = :import_log_id"
+        ), {"rejected": rejected, "reject_file": reject_file, "import_log_id": import_log_id})
+
+    def _failed_records(self, conn, import_log_id: int) -> int:
+        """Rows of the import rejected so far, as committed by every task loading it."""
+        row = conn.execute(text(
+            "SELECT failed_records FROM core_importlog WHERE id = :import_log_id"
+        ), {"import_log_id": import_log_id}).first()
+        return row[0] if row else 0
+
+    def _record_load_counts(self, conn, import_log_id: int, inserted: int, updated: int) -> None:
+        """Adds the rows a chunk inserted and updated to the import, in the caller's transaction."""
+        conn.execute(text(
+            "UPDATE core_importlog "
+            "SET inserted_records = inserted_records + :inserted, "
+            "updated_records = updated_records + :updated "
+            "WHERE id = :import_log_id"
+        ), {"inserted": inserted, "updated": updated, "import_log_id": import_log_id})
+
+    def _load_checkpoint(self, conn, import_log_id: int, shard: int) -> Tuple[int, List[int], int]:
+        """Returns the chunks committed in order and out of order, and the rows committed, for an import or shard."""
+        row = conn.execute(text(
+            "SELECT chunks_committed, chunks_ahead, rows_committed FROM core_importcheckpoint "
+            "WHERE import_log_id = :import_log_id AND shard = :shard"
+        ), {"import_log_id": import_log_id, "shard": shard}).first()
+        return (row[0], list(row[1] or []), row[2]) if row else (0, [], 0)
+
+    def _save_checkpoint(
+        self,
+        conn,
+        import_log_id: int,
+        shard: int,
+        chunks_committed: int,
+        chunks_ahead: List[int],
+        rows_committed: int
+    ) -> None:
+        """Records the committed chunks in the caller's transaction."""
+        conn.execute(text(
+            "INSERT INTO core_importcheckpoint "
+            "(import_log_id, shard, chunks_committed, chunks_ahead, rows_committed, updated_at) "
+            "VALUES (:import_log_id, :shard, :chunks_committed, CAST(:chunks_ahead AS jsonb), :rows_committed, now()) "
+            "ON CONFLICT (import_log_id, shard) DO UPDATE SET "
+            "chunks_committed = EXCLUDED.chunks_committed, "
+            "chunks_ahead = EXCLUDED.chunks_ahead, "
+            "rows_committed = EXCLUDED.rows_committed, "
+            "updated_at = EXCLUDED.updated_at"
+        ), {
+            "import_log_id": import_log_id,
+            "shard": shard,
+            "chunks_committed": chunks_committed,
+            "chunks_ahead": json.dumps(chunks_ahead),
+            "rows_committed": rows_committed,
+        })
 
     def _update_error(self, conn, import_log_id: int, error_message: str) -> None:
-        """Updates the error status in the import log."""
+        """Records the error on the import log; the task sets the final status."""
         try:
             conn.execute(text(
                 "UPDATE core_importlog "
-                "SET status = 'failed', error_message = :error_message "
+                "SET error_message = :error_message "
                 "WHERE id = :import_log_id"
             ), {"error_message": error_message, "import_log_id": import_log_id})
             conn.commit()
@@ -0,0 +1,60 @@
+import logging
+from typing import Optional
+
+from django.conf import settings
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, Engine
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[Engine] = None
+
+
+def build_engine() -> Engine:
+    """Creates a pooled SQLAlchemy engine from the Django default database settings."""
+    database = settings.DATABASES['default']
+    pool_options = getattr(settings, 'IMPORT_DB_POOL', {})
+
+    url = URL.create(
+        'postgresql',
+        username=database.get('USER'),
+        password=database.get('PASSWORD'),
+        host=database.get('HOST'),
+        port=int(database['PORT']) if database.get('PORT') else None,
+        database=database.get('NAME'),
+    )
+    return create_engine(
+        url,
+        pool_size=pool_options.get('pool_size', 5),
+        max_overflow=pool_options.get('max_overflow', 5),
+        pool_timeout=pool_options.get('pool_timeout', 30),
+        pool_recycle=pool_options.get('pool_recycle', 1800),
+        pool_pre_ping=True,
+    )
+
+
+def get_engine() -> Engine:
+    """Returns the engine shared by every import running in this process."""
+    global _engine
+    if _engine is None:
+        _engine = build_engine()
+    return _engine
+
+
+def init_engine() -> Engine:
+    """Creates a fresh engine for this process, discarding any inherited pool."""
+    global _engine
+    if _engine is not None:
+        # Connections inherited across fork() must not be closed from the child
+        _engine.dispose(close=False)
+    _engine = build_engine()
+    logger.info("Initialised import database engine for worker process")
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Closes all pooled connections held by this process."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
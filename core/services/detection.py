@@ -0,0 +1,223 @@
+import codecs
+import csv
+import os
+import random
+import re
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List
+
+import chardet
+import openpyxl
+
+from .archives import csv_members, is_archive, members_size, read_member_head
+from .compression import detect_compression, sample_decompressed
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 64 * 1024
+RANDOM_BLOCKS = 4
+CANDIDATE_DELIMITERS = [',', ';', '\t', '|']
+FALLBACK_ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Error handler for parsing: bytes the detected encoding cannot decode become U+FFFD and are counted,
+# since detection only samples the file and one stray byte must not fail an import partway through
+DECODE_ERRORS = 'csv_importer_replace'
+_decode_state = threading.local()
+
+
+def _replace_and_count(error: UnicodeError):
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    _decode_state.replaced = replaced_bytes() + error.end - error.start
+    return '\ufffd', error.end
+
+
+codecs.register_error(DECODE_ERRORS, _replace_and_count)
+
+
+def replaced_bytes() -> int:
+    """Undecodable bytes replaced so far by DECODE_ERRORS in this thread."""
+    return getattr(_decode_state, 'replaced', 0)
+
+
+# 1.234.567,89 style amounts indicate '.' grouping with ',' decimals
+EUROPEAN_NUMBER = re.compile(r'\b\d{1,3}(?:\.\d{3})+,\d+\b')
+
+
+@dataclass(frozen=True)
+class FileProfile:
+    """Encoding and CSV dialect decided once for a file from a bounded sample."""
+    encoding: str
+    bom: bool
+    delimiter: str
+    quotechar: str
+    thousands: str
+    decimal: str
+    sample_bytes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def read_csv_options(self) -> Dict[str, Any]:
+        """Keyword arguments for pd.read_csv matching this profile."""
+        return {
+            'encoding': self.encoding,
+            'encoding_errors': DECODE_ERRORS,
+            'sep': self.delimiter,
+            'quotechar': self.quotechar,
+            'thousands': self.thousands,
+            'decimal': self.decimal,
+        }
+
+
+def read_sample_blocks(file_path: str, block_size: int = BLOCK_SIZE, random_blocks: int = RANDOM_BLOCKS) -> List[bytes]:
+    """Reads the head, the tail and a few random blocks of a file.
+
+    Blocks other than the head are trimmed to whole lines so a block never
+    starts or ends inside a record or a multi-byte character.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        if file_size <= block_size * (random_blocks + 2):
+            return [file.read()]
+
+        # Seed on the file size so repeated detection of the same file agrees
+        rng = random.Random(file_size)
+        offsets = sorted(rng.randrange(block_size, file_size - 2 * block_size) for _ in range(random_blocks))
+        offsets.append(file_size - block_size)
+
+        blocks = [file.read(block_size)]
+        for offset in offsets:
+            file.seek(offset)
+            block = file.read(block_size)
+            first_newline = block.find(b'\n')
+            last_newline = block.rfind(b'\n')
+            if first_newline != -1 and last_newline > first_newline:
+                blocks.append(block[first_newline + 1:last_newline + 1])
+        return blocks
+
+
+def _detect_encoding(blocks: List[bytes]) -> str:
+    """Picks an encoding that decodes every sampled block."""
+    sample = b''.join(blocks)
+    detected = chardet.detect(sample)['encoding'] or 'utf-8'
+    # ASCII samples are treated as UTF-8, which decodes everything ASCII does
+    if detected.lower() == 'ascii':
+        detected = 'utf-8'
+
+    for encoding in [detected] + FALLBACK_ENCODINGS:
+        try:
+            for block in blocks:
+                block.decode(encoding)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            logger.debug(f"Sample does not decode as {encoding}")
+    return 'latin1'
+
+
+def _detect_dialect(head: str) -> csv.Dialect:
+    """Sniffs the delimiter and quote character from the head of the file."""
+    lines = head.splitlines()[:50]
+    # Drop a possibly truncated last line
+    if len(lines) > 1:
+        lines = lines[:-1]
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines), delimiters=''.join(CANDIDATE_DELIMITERS))
+    except csv.Error:
+        # Fall back to the candidate that splits the header into the most fields
+        header = lines[0] if lines else ''
+        delimiter = max(CANDIDATE_DELIMITERS, key=header.count)
+
+        class FallbackDialect(csv.excel):
+            pass
+        FallbackDialect.delimiter = delimiter
+        return FallbackDialect()
+
+
+def detect_file_profile(file_path: str) -> FileProfile:
+    """Decides encoding, BOM, delimiter, quote character and number format from a bounded sample."""
+    profile = profile_from_blocks(read_sample_blocks(file_path))
+    logger.info(f"Detected file profile for {file_path}: {profile}")
+    return profile
+
+
+def detect_member_profile(file_path: str, member: str) -> FileProfile:
+    """Profiles an archive member from its head; members cannot be sampled at random offsets cheaply."""
+    profile = profile_from_blocks([read_member_head(file_path, member, BLOCK_SIZE)])
+    logger.info(f"Detected file profile for {file_path}:{member}: {profile}")
+    return profile
+
+
+def detect_compressed_profile(file_path: str, compression: str) -> FileProfile:
+    """Profiles a compressed file from the head of its decompressed stream."""
+    head, _ = sample_decompressed(file_path, compression, BLOCK_SIZE)
+    profile = profile_from_blocks([head])
+    logger.info(f"Detected file profile for {file_path} ({compression}): {profile}")
+    return profile
+
+
+def profile_from_blocks(blocks: List[bytes]) -> FileProfile:
+    """Builds a profile from sampled blocks; the first block must be the head of the file."""
+    head = blocks[0]
+
+    bom_encoding = next((encoding for bom, encoding in BOMS if head.startswith(bom)), None)
+    encoding = bom_encoding or _detect_encoding(blocks)
+
+    text = head.decode(encoding, errors='replace')
+    dialect = _detect_dialect(text)
+    delimiter = dialect.delimiter
+    quotechar = dialect.quotechar or '"'
+
+    sample_text = '\n'.join(block.decode(encoding, errors='replace') for block in blocks)
+    if delimiter != ',' and EUROPEAN_NUMBER.search(sample_text):
+        thousands, decimal = '.', ','
+    else:
+        thousands, decimal = ',', '.'
+
+    return FileProfile(
+        encoding=encoding,
+        bom=bom_encoding is not None,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        thousands=thousands,
+        decimal=decimal,
+        sample_bytes=sum(len(block) for block in blocks),
+    )
+
+
+def estimate_row_count(file_path: str) -> int:
+    """Estimates the number of data rows from the head of the file and its size."""
+    if file_path.endswith('.xlsx') or file_path.endswith('.xls'):
+        # Read-only workbooks report the sheet dimension without loading rows
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+
+    compression = None if is_archive(file_path) else detect_compression(file_path)
+    if is_archive(file_path):
+        members = csv_members(file_path)
+        size = members_size(file_path, members)
+        head = read_member_head(file_path, members[0], BLOCK_SIZE)
+    elif compression is not None:
+        # A larger head gives a steadier compression ratio
+        head, ratio = sample_decompressed(file_path, compression, 16 * BLOCK_SIZE)
+        size = len(head) if len(head) < 16 * BLOCK_SIZE else int(os.path.getsize(file_path) * ratio)
+    else:
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as file:
+            head = file.read(BLOCK_SIZE)
+
+    lines = head.count(b'\n')
+    if size <= len(head) or lines == 0:
+        return max(lines - 1, 0)
+    return max(int(size * lines / len(head)) - 1, 0)
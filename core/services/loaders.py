@@ -0,0 +1,239 @@
+import csv
+import io
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+import pandas as pd
+from django.conf import settings
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+COPY_NULL = '\\N'
+# Text a blank cell is left as once cleaning has converted it to a string
+BLANK_VALUES = ('', 'nan', 'None', 'NaT')
+
+
+class ToSqlLoader:
+    """Inserts chunks with multi-row INSERT statements through DataFrame.to_sql.
+
+    Loaders write on the caller's connection and never commit, so a chunk
+    can be committed together with the import's checkpoint. After each load,
+    last_inserted and last_updated hold the rows the chunk added and changed.
+    """
+    name = 'to_sql'
+
+    def __init__(self, engine: Engine, table_name: str):
+        self.engine = engine
+        self.table_name = table_name
+        self.last_inserted = 0
+        self.last_updated = 0
+
+    def load(self, chunk: pd.DataFrame, conn: Connection) -> int:
+        self._insert(chunk, conn, self.table_name)
+        self.last_inserted, self.last_updated = len(chunk), 0
+        return len(chunk)
+
+    def close(self) -> None:
+        """Releases anything the loader created; called once the import stops loading."""
+
+    @staticmethod
+    def _insert(chunk: pd.DataFrame, conn: Connection, table_name: str) -> None:
+        chunk.to_sql(
+            table_name,
+            conn,
+            if_exists='append',
+            index=False,
+            method='multi'
+        )
+
+
+class CopyLoader(ToSqlLoader):
+    """Streams chunks into the table with PostgreSQL COPY ... FROM STDIN (CSV format)."""
+    name = 'copy'
+
+    def __init__(self, engine: Engine, table_name: str):
+        super().__init__(engine, table_name)
+        self._column_types: Optional[Dict[str, str]] = None
+
+    @property
+    def column_types(self) -> Dict[str, str]:
+        """Target column data types, read once per loader."""
+        if self._column_types is None:
+            with self.engine.connect() as conn:
+                result = conn.execute(text(
+                    "SELECT column_name, data_type FROM information_schema.columns "
+                    "WHERE table_name = :table_name"
+                ), {"table_name": self.table_name})
+                self._column_types = {row[0]: row[1] for row in result}
+        return self._column_types
+
+    def _prepare(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Converts columns to the text form COPY expects for their target types."""
+        prepared = chunk.copy(deep=False)
+        for col in prepared.columns:
+            data_type = self.column_types.get(col)
+            if data_type in INTEGER_TYPES and pd.api.types.is_float_dtype(prepared[col]):
+                # Floats such as 3.0 are rejected by COPY into integer columns
+                prepared[col] = prepared[col].round().astype('Int64')
+            elif data_type == 'boolean' and pd.api.types.is_bool_dtype(prepared[col]):
+                prepared[col] = prepared[col].map({True: 't', False: 'f'})
+        return prepared
+
+    def _copy_sql(self, table_name: str, columns: List[str]) -> str:
+        quoted_columns = ', '.join(f'"{col}"' for col in columns)
+        return (
+            f'COPY "{table_name}" ({quoted_columns}) FROM STDIN '
+            f"WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        )
+
+    def load(self, chunk: pd.DataFrame, conn: Connection) -> int:
+        self.last_inserted, self.last_updated = len(chunk), 0
+        if chunk.empty:
+            return 0
+        self._copy(chunk, conn, self.table_name)
+        return len(chunk)
+
+    def _copy(self, chunk: pd.DataFrame, conn: Connection, table_name: str) -> None:
+        buffer = io.StringIO()
+        self._prepare(chunk).to_csv(
+            buffer,
+            index=False,
+            header=False,
+            na_rep=COPY_NULL,
+            quoting=csv.QUOTE_MINIMAL
+        )
+        buffer.seek(0)
+        copy_sql = self._copy_sql(table_name, [str(col) for col in chunk.columns])
+
+        # COPY runs on the DBAPI connection inside the caller's transaction
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            elif hasattr(cursor, 'copy'):
+                # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    while data := buffer.read(1024 * 1024):
+                        copy.write(data)
+            else:
+                logger.warning(f"Driver does not support COPY, falling back to to_sql for {table_name}")
+                self._insert(chunk, conn, table_name)
+        finally:
+            cursor.close()
+
+
+class UpsertLoader(CopyLoader):
+    """COPYs each chunk into an UNLOGGED staging table and merges it into the target.
+
+    The merge is one INSERT ... ON CONFLICT on the table's key from
+    settings.IMPORT_UPSERT_KEYS, so re-importing a file updates rows instead
+    of appending copies. The key needs a unique index on the target table.
+    Within a chunk the last row for a key wins; rows with a blank key are
+    staged as NULL and always inserted.
+    """
+    name = 'upsert'
+    # Kept from the first import of a row when it is updated
+    INSERT_ONLY_COLUMNS = ('create_date', 'create_uid')
+
+    def __init__(self, engine: Engine, table_name: str):
+        super().__init__(engine, table_name)
+        key_columns = getattr(settings, 'IMPORT_UPSERT_KEYS', {}).get(table_name)
+        if not key_columns:
+            raise ValueError(f"No upsert key configured for {table_name} in IMPORT_UPSERT_KEYS")
+        self.key_columns: List[str] = list(key_columns)
+        # One staging table per loader, so concurrent shards never share one
+        self.staging_table = f'{table_name}_staging_{uuid.uuid4().hex[:12]}'
+
+    def load(self, chunk: pd.DataFrame, conn: Connection) -> int:
+        self.last_inserted, self.last_updated = 0, 0
+        if chunk.empty:
+            return 0
+
+        columns = [str(col) for col in chunk.columns]
+        missing = [col for col in self.key_columns if col not in columns]
+        if missing:
+            raise ValueError(f"Upsert key columns missing from {self.table_name} data: {missing}")
+
+        # Recreated per chunk in the chunk's transaction, so a rolled-back chunk leaves nothing behind
+        quoted_columns = ', '.join(f'"{col}"' for col in columns)
+        conn.execute(text(f'DROP TABLE IF EXISTS "{self.staging_table}"'))
+        conn.execute(text(
+            f'CREATE UNLOGGED TABLE "{self.staging_table}" AS '
+            f'SELECT {quoted_columns} FROM "{self.table_name}" WITH NO DATA'
+        ))
+        self._copy(self._null_blank_keys(chunk), conn, self.staging_table)
+
+        inserted, updated = conn.execute(text(self._merge_sql(columns))).one()
+        self.last_inserted, self.last_updated = inserted, updated
+        return len(chunk)
+
+    def _null_blank_keys(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Replaces blank key values with NULL.
+
+        Cleaning turns empty text cells into '' or 'nan', which would make
+        every row without a key one and the same key to the merge.
+        """
+        staged = chunk.copy(deep=False)
+        for col in self.key_columns:
+            blank = staged[col].isna() | staged[col].astype(str).str.strip().isin(BLANK_VALUES)
+            if blank.any():
+                staged[col] = staged[col].astype(object).mask(blank, None)
+        return staged
+
+    def _merge_sql(self, columns: List[str]) -> str:
+        quoted_columns = ', '.join(f'"{col}"' for col in columns)
+        keys = ', '.join(f'"{col}"' for col in self.key_columns)
+        keys_present = ' AND '.join(f'"{col}" IS NOT NULL' for col in self.key_columns)
+        update_columns = [
+            col for col in columns
+            if col not in self.key_columns and col not in self.INSERT_ONLY_COLUMNS
+        ]
+        if update_columns:
+            assignments = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
+            conflict_action = f'DO UPDATE SET {assignments}'
+        else:
+            conflict_action = 'DO NOTHING'
+
+        # ON CONFLICT cannot touch a row twice, so keep only the last staged row per key.
+        # xmax is 0 on freshly inserted rows and set on rows the conflict updated.
+        return (
+            f'WITH merged AS ('
+            f'INSERT INTO "{self.table_name}" ({quoted_columns}) '
+            f'(SELECT DISTINCT ON ({keys}) {quoted_columns} FROM "{self.staging_table}" '
+            f'WHERE {keys_present} ORDER BY {keys}, ctid DESC) '
+            f'UNION ALL '
+            f'(SELECT {quoted_columns} FROM "{self.staging_table}" WHERE NOT ({keys_present})) '
+            f'ON CONFLICT ({keys}) {conflict_action} '
+            f'RETURNING (xmax = 0) AS inserted'
+            f') '
+            f'SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged'
+        )
+
+    def close(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(f'DROP TABLE IF EXISTS "{self.staging_table}"'))
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Could not drop staging table {self.staging_table}: {e}")
+
+
+LOADERS = {
+    ToSqlLoader.name: ToSqlLoader,
+    CopyLoader.name: CopyLoader,
+    UpsertLoader.name: UpsertLoader,
+}
+
+
+def get_loader(engine: Engine, table_name: str) -> ToSqlLoader:
+    """Returns the loader configured for a table in settings.IMPORT_LOADERS."""
+    loaders = getattr(settings, 'IMPORT_LOADERS', {})
+    loader_name = loaders.get(table_name, getattr(settings, 'IMPORT_DEFAULT_LOADER', CopyLoader.name))
+    if loader_name not in LOADERS:
+        raise ValueError(f"Unknown loader '{loader_name}' configured for {table_name}")
+    return LOADERS[loader_name](engine, table_name)
@@ -0,0 +1,145 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Reference tables used to map names to ids, with their key columns in match priority order
+LOOKUP_TABLES: Dict[str, Tuple[str, List[str]]] = {
+    'civil_servant_category': ("SELECT id, name FROM civil_servant_category", ['name']),
+    'repayment_product': ("SELECT id, name, code FROM repayment_product", ['name', 'code']),
+}
+
+Lookup = Dict[str, Dict[str, int]]
+
+# Per-process copy of each lookup with the time it was loaded and its version
+_local_lookups: Dict[str, Tuple[float, Optional[int], Lookup]] = {}
+
+
+def _cache_key(table_name: str, version: int) -> str:
+    return f'csv_importer:lookup:{table_name}:v{version}'
+
+
+def _version_key(table_name: str) -> str:
+    return f'csv_importer:lookup_version:{table_name}'
+
+
+def _current_version(table_name: str) -> Optional[int]:
+    """Version of a lookup in the shared cache, bumped by invalidate_lookup; None if the cache is unavailable."""
+    try:
+        return cache.get(_version_key(table_name), 0)
+    except Exception as e:
+        # Checked on every chunk, so an outage is not logged as a warning each time
+        logger.debug(f"Lookup cache unavailable for {table_name}: {e}")
+        return None
+
+
+def _cache_ttl() -> int:
+    return getattr(settings, 'IMPORT_LOOKUP_CACHE_TTL', 600)
+
+
+def normalize_keys(series: pd.Series) -> pd.Series:
+    """Normalizes lookup keys the same way for reference rows and file values."""
+    return series.astype('string').str.strip().str.lower()
+
+
+def _load_lookup(engine: Engine, table_name: str) -> Lookup:
+    query, key_columns = LOOKUP_TABLES[table_name]
+    with engine.connect() as conn:
+        rows = pd.read_sql(query, conn)
+
+    lookup: Lookup = {}
+    for key_column in key_columns:
+        keys = normalize_keys(rows[key_column])
+        present = keys.notna()
+        lookup[key_column] = dict(zip(keys[present], rows.loc[present, 'id'].astype(int)))
+    logger.info(f"Loaded {len(rows)} rows from {table_name} into the lookup cache")
+    return lookup
+
+
+def get_lookup(engine: Engine, table_name: str) -> Lookup:
+    """Returns the key-to-id mappings for a reference table.
+
+    Lookups are kept in this process and in the configured cache backend
+    for IMPORT_LOOKUP_CACHE_TTL seconds, so the reference table is queried
+    at most once per TTL across all workers. Each call checks the lookup's
+    version in the cache, so invalidate_lookup reaches every worker at once;
+    while the cache is unavailable the local copy is used until its TTL.
+    """
+    ttl = _cache_ttl()
+    version = _current_version(table_name)
+    local = _local_lookups.get(table_name)
+    if (
+        local is not None
+        and time.monotonic() - local[0] < ttl
+        and (version is None or local[1] == version)
+    ):
+        return local[2]
+
+    lookup: Optional[Lookup] = None
+    if version is not None:
+        try:
+            lookup = cache.get(_cache_key(table_name, version))
+        except Exception as e:
+            logger.warning(f"Lookup cache unavailable for {table_name}: {e}")
+
+    if lookup is None:
+        lookup = _load_lookup(engine, table_name)
+        if version is not None:
+            try:
+                cache.set(_cache_key(table_name, version), lookup, timeout=ttl)
+            except Exception as e:
+                logger.warning(f"Could not store {table_name} lookup in cache: {e}")
+
+    _local_lookups[table_name] = (time.monotonic(), version, lookup)
+    return lookup
+
+
+def prime_lookup(table_name: str, lookup: Lookup) -> None:
+    """Installs a lookup in this process without querying the database (used by benchmarks)."""
+    _local_lookups[table_name] = (time.monotonic(), None, lookup)
+
+
+def invalidate_lookup(table_name: Optional[str] = None) -> None:
+    """Drops cached lookups for one reference table, or all of them, in every worker.
+
+    Bumping the version makes each worker's next get_lookup reload it; the
+    entry cached under the old version simply expires.
+    """
+    table_names = [table_name] if table_name else list(LOOKUP_TABLES)
+    for name in table_names:
+        _local_lookups.pop(name, None)
+        try:
+            # add() creates the counter if it does not exist yet, so incr() never misses it
+            cache.add(_version_key(name), 0, timeout=None)
+            cache.incr(_version_key(name))
+        except Exception as e:
+            logger.warning(f"Could not invalidate {name} lookup in cache: {e}")
+
+
+def map_lookup(series: pd.Series, lookup: Lookup, keep_unmatched: bool = False) -> Tuple[pd.Series, List[str]]:
+    """Maps a column of names or codes to ids using each key column in priority order.
+
+    Returns the mapped column and the distinct values that did not match.
+    Unmatched values are kept as-is when keep_unmatched is set, otherwise
+    they become NaN.
+    """
+    keys = normalize_keys(series)
+    mapped = pd.Series(pd.NA, index=series.index, dtype=object)
+    for key_mapping in lookup.values():
+        missing = mapped.isna()
+        if not missing.any():
+            break
+        matched = keys[missing].map(key_mapping).dropna()
+        mapped[matched.index] = matched.astype('int64')
+
+    unmatched_mask = mapped.isna() & series.notna()
+    unmatched = [str(value) for value in series[unmatched_mask].unique()]
+    if keep_unmatched:
+        return mapped.where(~unmatched_mask, series), unmatched
+    return mapped.astype('Int64'), unmatched
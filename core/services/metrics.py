@@ -0,0 +1,93 @@
+import logging
+import resource
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+def reset_peak_rss() -> None:
+    """Resets the kernel's peak RSS counter for this process (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size in KB since the last reset_peak_rss()."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Lifetime peak where the counter cannot be reset
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        'calls': 0,
+        'wall_seconds': 0.0,
+        'cpu_seconds': 0.0,
+        'peak_rss_kb': 0,
+    }
+
+
+class StageMetrics:
+    """Accumulates wall time, CPU time and peak RSS for each stage of an import."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        reset_peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, _empty_stats())
+            stats['calls'] += 1
+            stats['wall_seconds'] += time.perf_counter() - wall_start
+            stats['cpu_seconds'] += time.process_time() - cpu_start
+            stats['peak_rss_kb'] = max(stats['peak_rss_kb'], peak_rss_kb())
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        """Adds stage timings recorded elsewhere: times and calls add up, peak RSS is the maximum."""
+        for name, stats in stages.items():
+            total = self.stages.setdefault(name, _empty_stats())
+            total['calls'] += stats.get('calls', 0)
+            total['wall_seconds'] += stats.get('wall_seconds', 0.0)
+            total['cpu_seconds'] += stats.get('cpu_seconds', 0.0)
+            total['peak_rss_kb'] = max(total['peak_rss_kb'], stats.get('peak_rss_kb', 0))
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                **stats,
+                'wall_seconds': round(stats['wall_seconds'], 4),
+                'cpu_seconds': round(stats['cpu_seconds'], 4),
+            }
+            for name, stats in self.stages.items()
+        }
+
+    def log_summary(self) -> None:
+        for name, stats in self.to_dict().items():
+            logger.info(
+                f"Stage {name}: {stats['calls']} calls, {stats['wall_seconds']}s wall, "
+                f"{stats['cpu_seconds']}s CPU, peak RSS {stats['peak_rss_kb']} KB"
+            )
+
+
+def merge_stage_metrics(metrics: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Combines the stage metrics of several tasks, such as the shards of an import."""
+    merged = StageMetrics()
+    for stages in metrics:
+        merged.merge(stages or {})
+    return merged.to_dict()
@@ -0,0 +1,73 @@
+import csv
+import glob
+import logging
+import os
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Exception classes (by name, across psycopg2, psycopg 3 and SQLAlchemy) caused by
+# the data in a row rather than by the connection or the statement
+ROW_ERROR_NAMES = {'DataError', 'IntegrityError'}
+
+Reject = Tuple[int, str]
+
+
+def is_row_error(error: BaseException) -> bool:
+    """Whether a load error can be blamed on rows, so retrying smaller batches can isolate them."""
+    original = getattr(error, 'orig', None) or error
+    return any(cls.__name__ in ROW_ERROR_NAMES for cls in type(original).__mro__)
+
+
+def short_error(error: BaseException) -> str:
+    """First line of the database error, without the statement and parameters SQLAlchemy appends."""
+    original = getattr(error, 'orig', None) or error
+    lines = str(original).strip().splitlines()
+    return lines[0] if lines else type(original).__name__
+
+
+def reject_file_path(import_log_id: int, shard: int = 0) -> str:
+    """Reject file of an import, or of one shard of it until finalize merges them."""
+    directory = os.path.join(settings.MEDIA_ROOT, 'rejects')
+    name = f'import_{import_log_id}.csv' if shard == 0 else f'import_{import_log_id}.shard{shard}.csv'
+    return os.path.join(directory, name)
+
+
+def write_rejects(path: str, rows: pd.DataFrame, rejects: List[Reject], first_row: int, shard: int = 0) -> None:
+    """Appends rejected rows of a chunk with their row number and database error.
+
+    Each reject is (position in the chunk, error); the row number written is
+    the 1-based data row of the file (or shard) counting from first_row.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    positions = [position for position, _ in rejects]
+    frame = rows.iloc[positions].copy()
+    frame.insert(0, 'error', [error for _, error in rejects])
+    frame.insert(0, 'row_number', [first_row + position for position in positions])
+    frame.insert(0, 'shard', shard)
+    write_header = not os.path.exists(path)
+    frame.to_csv(path, mode='a', index=False, header=write_header, quoting=csv.QUOTE_MINIMAL)
+
+
+def merge_shard_rejects(import_log_id: int) -> Optional[str]:
+    """Concatenates the shard reject files of an import into its single reject file."""
+    shard_files = sorted(glob.glob(reject_file_path(import_log_id, 0)[:-len('.csv')] + '.shard*.csv'))
+    if not shard_files:
+        return None
+
+    path = reject_file_path(import_log_id)
+    write_header = not os.path.exists(path)
+    with open(path, 'a', newline='') as merged:
+        for shard_file in shard_files:
+            with open(shard_file, newline='') as part:
+                header = part.readline()
+                if write_header:
+                    merged.write(header)
+                    write_header = False
+                for line in part:
+                    merged.write(line)
+            os.remove(shard_file)
+    return path
@@ -0,0 +1,360 @@
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from .validation import Pattern, Range, Required, Rule
+
+# Filled in on every row the import writes; timestamps are taken per chunk
+AUDIT_TIMESTAMP_COLUMNS = ('create_date', 'write_date')
+AUDIT_DEFAULTS = {
+    'create_uid': 1,
+    'write_uid': 1
+}
+
+CIVIL_SERVANT_COLUMNS = {
+    "Employee Name": "name",
+    "IPPIS Number": "ippis_number",
+    "NSCDC Number": "nscdc_number",
+    "ORACLE Number": "oracle_number",
+    "EMP Number": "emp_number",
+    "NPF Number": "npf_number",
+    "NCS Number": "ncs_number",
+    "PR Number": "pr_number",
+    "TI Number": "ti_number",
+    "PF Number": "pf_number",
+    "FCT Number": "fct_number",
+    "BVN": "bvn",
+    "RankName": "rank_name",
+    "GradeLevel": "grade_level",
+    "Step": "step",
+    "Department": "department",
+    "MDA": "mda",
+    "Gender": "gender",
+    "DateofFirstAppt": "date_of_first_application",
+    "Birthdate": "birthdate",
+    "BankName": "bank_name",
+    "BankCode": "bank_code",
+    "BranchName": "branch_name",
+    "AccountNumber": "account_number",
+    "NetPayment": "net_payment",
+    "CivilServantCategory": "civil_servant_type_id",
+    "Net Payment Month": "net_payment_month",
+    "Email Address": "net_payment_month",
+}
+
+LOAN_DETAILS_COLUMNS = {
+    "Tenor": "loan_tenor",
+    "LOAN TYPE": "loan_type",
+    "NSCDC NO": "nscdc_no",
+    "NAME": "name",
+    "ACCT NO": "account_no",
+    "Initiated By": "initiated_by",
+    "Relation Officer": "relation_officer",
+    "BANK": "bank",
+    "CODE": "code",
+    0.01: "one_percent",
+    0.015: "one_five_percent",
+    "Disbursement Date": "disbursement_dates",
+    "OLD LOAN": "old_loan_amount",
+    "NEW LOAN": "new_loan_amount",
+    "DISB AMOUNT": "disbursement_amount",
+    "LOAN BALANCE": "loan_balance",
+    "IPPIS Number": "ippis_number",
+    "Emp Number": "emp_number",
+    "NPF Number": "npf_number",
+    "NCS Number": "ncs_number",
+    "PR Number": "pr_number",
+    "TI Number": "ti_number",
+    "FCT Number": "fct_number",
+    "PF Number": "pf_number",
+    "Oracle Number": "oracle_number",
+}
+
+REPAYMENT_COLUMNS = {
+    "IPPIS NO": "ippis_no",
+    "Employee Name": "employee_name",
+    "Year": "year",
+    "Amount": "amount",
+    "Product": "product_id",
+    "Month": "month_field",
+    "New PSN": "new_psn",
+    "Old PSN": "old_psn",
+    "Employee Number": "employee_no",
+    "Staff ID": "staff_id",
+    "Legacy ID": "legacy_id",
+    "Full Name": "full_name",
+    "Element": "element",
+    "Period": "period",
+    "Command": "command",
+    "Staff Number": "staff_number",
+    "Staff Name": "staff_name",
+    "Loan Type": "loan_type",
+    "Service Number": "service_number",
+    "Pencom ID": "pencom_id",
+    "Account ID": "account_id",
+    "Bank Code": "bank_code",
+    "Beneficiary": "beneficiary",
+    "Element Name": "element_name",
+    "NHF Number": "nhf_number",
+    "Employee Number": "employee_number",
+    "IPPIS Number": "ippis_number",
+    "Name": "name",
+    "Period Name": "period_name",
+    "WACS Creditors Name": "wacs_creditors_name",
+    "Ministry Name": "ministry_name",
+    "Value Data": "value_data",
+    "Narration": "narration",
+    "Loan Amount": "loan_amount",
+    "Deduction": "deduction",
+    "WACS Monthly Deduction Amount": "wacs_monthly_deduction_amount",
+    "NSCDC Number": "nscdc_no",
+    "Oracle Number": "oracle_number",
+    "EMP Number": "emp_number",
+    "NPF Number": "npf_number",
+    "NCS Number": "ncs_number",
+    "PR Number": "pr_number",
+    "TI Number": "ti_number",
+    "FCT Number": "fct_number",
+    "PF Number": "pf_number"
+}
+
+MONTH_TO_NUMBER = {
+    'January': '01',
+    'February': '02',
+    'March': '03',
+    'April': '04',
+    'May': '05',
+    'June': '06',
+    'July': '07',
+    'August': '08',
+    'September': '09',
+    'October': '10',
+    'November': '11',
+    'December': '12'
+}
+
+LOAN_TYPE_MAPPING = {
+    'RENEWAL': 'renewal',
+    'NEWLOAN': 'new_loan',
+    'TOPUP': 'top_up',
+    'LOANCOMPLETED': 'completed_loan',
+    'RENEWAL ': 'renewal',
+    'NEWLOAN ': 'new_loan',
+    'TOPUP ': 'top_up',
+    'LOANCOMPLETED ': 'completed_loan',
+    ' RENEWAL': 'renewal',
+    ' NEWLOAN': 'new_loan',
+    ' TOPUP': 'top_up',
+    ' LOANCOMPLETED': 'completed_loan',
+    'NEW LOAN': 'new_loan',
+    'TOP UP': 'top_up',
+    'COMPLETED LOAN': 'completed_loan'
+}
+
+GENDER_MAPPING = {
+    # Case-insensitive mappings for various ways "Male" might be written
+    'male': 'male',
+    'm': 'male',
+    'Male': 'male',
+    'M': 'male',
+
+    # Case-insensitive mappings for various ways "Female" might be written
+    'female': 'female',
+    'f': 'female',
+    'Female': 'female',
+    'F': 'female'
+}
+
+
+@dataclass(frozen=True)
+class ValueMap:
+    """Normalizes the values of one column through a fixed mapping.
+
+    Unmatched values are kept as they are with keep_unmatched, replaced by
+    default when one is set, and become NaN otherwise. With normalize, values
+    are matched on their stripped, upper-cased text and blank values also
+    take the default.
+    """
+    column: str
+    mapping: Mapping[Any, Any]
+    normalize: bool = False
+    keep_unmatched: bool = False
+    default: Optional[Any] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, 'mapping', MappingProxyType(dict(self.mapping)))
+
+    def apply(self, series: pd.Series) -> Tuple[pd.Series, List[str]]:
+        """Returns the mapped column and the distinct values that did not match."""
+        if self.normalize:
+            keys = series.astype('string').str.strip().str.upper()
+            blank = (keys.isna() | (keys == '')).fillna(True).astype(bool)
+        else:
+            keys = series
+            blank = series.isna()
+
+        mapped = keys.map(self.mapping).astype(object)
+        unmatched_mask = mapped.isna() & ~blank
+        unmatched = [str(value) for value in series[unmatched_mask].unique()]
+
+        if self.keep_unmatched:
+            return mapped.where(mapped.notna(), series), unmatched
+        if self.default is not None:
+            return mapped.fillna(self.default), unmatched
+        return mapped, unmatched
+
+
+@dataclass(frozen=True)
+class LookupColumn:
+    """A column holding names or codes replaced with ids from a reference table."""
+    column: str
+    table: str
+    keep_unmatched: bool = False
+
+
+@dataclass(frozen=True)
+class TablePlan:
+    """Everything needed to transform a chunk for one target table, built once at import time.
+
+    Use compile_plan to build one; the mappings are read-only and the
+    column lists are tuples, so a plan can be shared by every import of
+    the table.
+    """
+    table_name: str
+    column_map: Mapping[Any, str]
+    numeric_columns: Tuple[str, ...]
+    integer_columns: Tuple[str, ...]
+    date_columns: Tuple[str, ...]
+    value_maps: Tuple[ValueMap, ...]
+    lookups: Tuple[LookupColumn, ...]
+    validation_rules: Tuple[Rule, ...]
+    # Mapped columns in column_map order, with the value added when a file lacks one
+    missing_values: Mapping[str, Any]
+    # Columns kept out of the string conversion in cleaning
+    non_text_columns: frozenset
+
+    @property
+    def expected_columns(self) -> List[str]:
+        return list(self.missing_values)
+
+    @property
+    def id_columns(self) -> Tuple[str, ...]:
+        return tuple(lookup.column for lookup in self.lookups)
+
+    @property
+    def required_columns(self) -> List[str]:
+        """Columns the target table must have: the audit columns and every mapped column."""
+        return list(AUDIT_TIMESTAMP_COLUMNS) + list(AUDIT_DEFAULTS) + self.expected_columns
+
+    @staticmethod
+    def default_values() -> Dict[str, Any]:
+        """Audit column values for the rows of one chunk."""
+        now = datetime.now()
+        values: Dict[str, Any] = {col: now for col in AUDIT_TIMESTAMP_COLUMNS}
+        values.update(AUDIT_DEFAULTS)
+        return values
+
+
+def compile_plan(
+    table_name: str,
+    column_map: Mapping[Any, str],
+    numeric_columns: Iterable[str] = (),
+    integer_columns: Iterable[str] = (),
+    date_columns: Iterable[str] = (),
+    value_maps: Iterable[ValueMap] = (),
+    lookups: Iterable[LookupColumn] = (),
+    validation_rules: Iterable[Rule] = ()
+) -> TablePlan:
+    """Freezes a table's column map, types, normalizers and rules into a TablePlan."""
+    numeric_columns = tuple(numeric_columns)
+    integer_columns = tuple(integer_columns)
+    lookups = tuple(lookups)
+    unknown = [col for col in integer_columns if col not in numeric_columns]
+    if unknown:
+        raise ValueError(f"Integer columns of {table_name} must also be numeric: {unknown}")
+
+    missing_values = {
+        col: 0.00 if col in numeric_columns else ''
+        for col in dict.fromkeys(column_map.values())
+    }
+    return TablePlan(
+        table_name=table_name,
+        column_map=MappingProxyType(dict(column_map)),
+        numeric_columns=numeric_columns,
+        integer_columns=integer_columns,
+        date_columns=tuple(date_columns),
+        value_maps=tuple(value_maps),
+        lookups=lookups,
+        validation_rules=tuple(validation_rules),
+        missing_values=MappingProxyType(missing_values),
+        non_text_columns=frozenset(numeric_columns) | {lookup.column for lookup in lookups},
+    )
+
+
+# Adding a target table means adding its plan here
+TABLE_PLANS: Mapping[str, TablePlan] = MappingProxyType({
+    plan.table_name: plan for plan in [
+        compile_plan(
+            'civil_servant',
+            CIVIL_SERVANT_COLUMNS,
+            numeric_columns=['net_payment'],
+            value_maps=[ValueMap('gender', GENDER_MAPPING)],
+            lookups=[LookupColumn('civil_servant_type_id', 'civil_servant_category')],
+            validation_rules=[
+                Required('name'),
+                Pattern('ippis_number', pattern=r'\d{1,12}'),
+                Pattern('account_number', pattern=r'\d{10}'),
+                Pattern('bvn', pattern=r'\d{11}'),
+                Pattern('bank_code', pattern=r'\d{3,6}'),
+                Range('grade_level', minimum=1, maximum=17, integer=True),
+                Range('step', minimum=1, maximum=15, integer=True),
+                Range('net_payment', minimum=0),
+            ],
+        ),
+        compile_plan(
+            'repayment',
+            REPAYMENT_COLUMNS,
+            numeric_columns=['amount', 'loan_amount', 'deduction', 'wacs_monthly_deduction_amount'],
+            value_maps=[ValueMap('month_field', MONTH_TO_NUMBER, keep_unmatched=True)],
+            # Products are matched on name first, then code
+            lookups=[LookupColumn('product_id', 'repayment_product', keep_unmatched=True)],
+            validation_rules=[
+                Pattern('ippis_no', pattern=r'\d{1,12}'),
+                Pattern('ippis_number', pattern=r'\d{1,12}'),
+                Range('year', minimum=2000, maximum=2100, integer=True),
+                Range('amount', minimum=0),
+                Range('loan_amount', minimum=0),
+                Range('deduction', minimum=0),
+            ],
+        ),
+        compile_plan(
+            'loan_details',
+            LOAN_DETAILS_COLUMNS,
+            numeric_columns=[
+                'loan_tenor', 'one_percent', 'one_five_percent', 'old_loan_amount',
+                'new_loan_amount', 'disbursement_amount', 'loan_balance'
+            ],
+            integer_columns=['loan_tenor'],
+            date_columns=['disbursement_dates'],
+            value_maps=[ValueMap('loan_type', LOAN_TYPE_MAPPING, normalize=True, default='new_loan')],
+            validation_rules=[
+                Required('name'),
+                Pattern('ippis_number', pattern=r'\d{1,12}'),
+                Pattern('account_no', pattern=r'\d{10}'),
+                Range('loan_tenor', minimum=1, maximum=120, integer=True),
+                Range('new_loan_amount', minimum=0),
+                Range('disbursement_amount', minimum=0),
+            ],
+        ),
+    ]
+})
+
+
+def get_plan(table_name: str) -> TablePlan:
+    """Returns the transform plan registered for a target table."""
+    if table_name not in TABLE_PLANS:
+        raise ValueError(f"No transform plan registered for table {table_name}")
+    return TABLE_PLANS[table_name]
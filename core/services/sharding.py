@@ -0,0 +1,103 @@
+import io
+import os
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Shard = Tuple[int, int]
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def read_header(file_path: str) -> bytes:
+    """Returns the raw bytes of the header line, including its line ending."""
+    with open(file_path, 'rb') as file:
+        return file.readline()
+
+
+def plan_shards(file_path: str, shard_bytes: int) -> List[Shard]:
+    """Splits the data rows of a CSV file into byte ranges that end on line boundaries.
+
+    Ranges are found by seeking, so planning costs one short read per
+    shard. A boundary may land inside a quoted field that spans lines;
+    callers check the plan with shards_start_records before using it.
+    """
+    file_size = os.path.getsize(file_path)
+    shards: List[Shard] = []
+    with open(file_path, 'rb') as file:
+        file.readline()
+        start = file.tell()
+        while start < file_size:
+            end = min(start + shard_bytes, file_size)
+            if end < file_size:
+                file.seek(end)
+                file.readline()
+                end = file.tell()
+            shards.append((start, end))
+            start = end
+    logger.info(f"Planned {len(shards)} shards of ~{shard_bytes} bytes for {file_path}")
+    return shards
+
+
+def shards_start_records(file_path: str, shards: List[Shard], quotechar: str) -> bool:
+    """Whether every shard boundary falls between records rather than inside a quoted field.
+
+    Quotes inside quoted fields are doubled, so a boundary is inside a
+    quoted field exactly when an odd number of quote characters precede it.
+    Counting them costs one sequential read of the file.
+    """
+    if not quotechar.isascii():
+        return False
+    quote = quotechar.encode('ascii')
+    quotes = read_header(file_path).count(quote)
+    with open(file_path, 'rb') as file:
+        # Shards are contiguous, so one pass up to the start of the last shard covers every boundary
+        file.seek(shards[0][0])
+        for _, end in shards[:-1]:
+            while file.tell() < end:
+                block = file.read(min(READ_BLOCK_SIZE, end - file.tell()))
+                if not block:
+                    break
+                quotes += block.count(quote)
+            if quotes % 2:
+                logger.info(f"Shard boundary at byte {end} of {file_path} is inside a quoted field")
+                return False
+    return True
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Reads the byte range [start, end) of a file, preceded by an optional prefix such as the header."""
+
+    def __init__(self, file_path: str, start: int, end: int, prefix: bytes = b''):
+        self._file = open(file_path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+        self._prefix = prefix
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[no-untyped-def]
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+
+        if self._remaining <= 0:
+            return 0
+        data = self._file.read(min(len(buffer), self._remaining))
+        size = len(data)
+        buffer[:size] = data
+        self._remaining -= size
+        return size
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def open_shard(file_path: str, start: int, end: int) -> io.BufferedReader:
+    """Opens a shard as a buffered binary stream that starts with the file's header line."""
+    return io.BufferedReader(ByteRangeReader(file_path, start, end, prefix=read_header(file_path)))
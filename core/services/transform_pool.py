@@ -0,0 +1,122 @@
+import logging
+import queue
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from billiard.einfo import ExceptionInfo
+from billiard.pool import Pool
+
+from .db import init_engine
+from .detection import FileProfile
+from .metrics import StageMetrics
+from .rejects import Reject
+from .validation import RuleSet
+
+logger = logging.getLogger(__name__)
+
+# Chunks submitted per worker before the parser waits for results
+CHUNKS_PER_WORKER = 2
+
+# The processor of a transform worker process, set up by _init_worker
+_processor = None
+
+
+@dataclass
+class TransformedChunk:
+    """A chunk after rename, lookups, validation and cleaning, with the work done on it."""
+    number: int
+    chunk: pd.DataFrame
+    invalid: List[Reject]
+    stages: Dict[str, Dict[str, Any]]
+    numeric_failures: Dict[str, int]
+    validation_report: Dict[str, Any]
+
+
+def _init_worker(table_name: str, profile: Optional[FileProfile]) -> None:
+    global _processor
+    # Imported here because csv_processor imports this module
+    from .csv_processor import CSVProcessor
+
+    # Lookups may be read from the database; never use connections inherited from the parent
+    init_engine()
+    _processor = CSVProcessor(table_name)
+    _processor.file_profile = profile
+
+
+def _transform(number: int, chunk: pd.DataFrame) -> TransformedChunk:
+    processor = _processor
+    # Counters start over for every chunk, so the parent can add them up
+    processor.metrics = StageMetrics()
+    processor.numeric_failures = {}
+    processor.validation = RuleSet(processor.plan.validation_rules)
+
+    chunk, invalid = processor.transform_chunk(chunk)
+    return TransformedChunk(
+        number=number,
+        chunk=chunk,
+        invalid=invalid,
+        stages=processor.metrics.stages,
+        numeric_failures=processor.numeric_failures,
+        validation_report=processor.validation.report(),
+    )
+
+
+class TransformPool:
+    """Transforms the chunks of one import in worker processes.
+
+    The importing process keeps parsing and loading, on a single database
+    connection; the CPU-bound rename, lookup, validation and cleaning steps
+    run in the workers. At most CHUNKS_PER_WORKER chunks per worker are in
+    flight, so memory stays bounded however far ahead the parser could run.
+    Results are returned in file order, or as soon as each is ready when
+    ordered is False.
+
+    billiard is used rather than multiprocessing because Celery's prefork
+    workers are daemonic processes, which multiprocessing will not let
+    start children.
+    """
+
+    def __init__(self, table_name: str, profile: Optional[FileProfile], workers: int, ordered: bool = True):
+        self.workers = workers
+        self.ordered = ordered
+        self._results: queue.Queue = queue.Queue()
+        self._pool = Pool(workers, initializer=_init_worker, initargs=(table_name, profile))
+        logger.info(f"Started {workers} transform workers for {table_name} ({'ordered' if ordered else 'unordered'})")
+
+    def map(self, chunks: Iterator[Tuple[int, pd.DataFrame]]) -> Iterator[TransformedChunk]:
+        """Transforms (number, chunk) pairs, yielding each result once it may be loaded."""
+        submitted: Deque[int] = deque()
+        done: Dict[int, TransformedChunk] = {}
+        for number, chunk in chunks:
+            self._pool.apply_async(
+                _transform, (number, chunk), callback=self._results.put, error_callback=self._results.put
+            )
+            submitted.append(number)
+            while len(submitted) >= self.workers * CHUNKS_PER_WORKER:
+                yield self._next_result(submitted, done)
+        while submitted:
+            yield self._next_result(submitted, done)
+
+    def _next_result(self, submitted: Deque[int], done: Dict[int, TransformedChunk]) -> TransformedChunk:
+        while not (self.ordered and submitted[0] in done):
+            result = self._results.get()
+            if isinstance(result, ExceptionInfo):
+                raise result.exception
+            if not self.ordered:
+                submitted.remove(result.number)
+                return result
+            done[result.number] = result
+        return done.pop(submitted.popleft())
+
+    def close(self) -> None:
+        # Results still in flight belong to an import that stopped early
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> 'TransformPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
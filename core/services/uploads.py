@@ -0,0 +1,49 @@
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def allocate_upload_file(file_name: str, total_size: int) -> str:
+    """Creates an empty file of the final size for parts to be written into."""
+    fs = FileSystemStorage()
+    # save() picks a name no other upload is using, so sessions never share files
+    name = fs.save(f'imports/{file_name}', ContentFile(b''))
+    file_path = fs.path(name)
+    with open(file_path, 'r+b') as file:
+        file.truncate(total_size)
+    return file_path
+
+
+def write_part(file_path: str, offset: int, expected_size: int, part: Any, checksum: str) -> str:
+    """Verifies one part's size and SHA-256, then writes it at its offset in the upload file.
+
+    part is the upload spooled by HashingUploadHandler, which hashed it as
+    it was received, so it is only read again to be copied into place. A
+    bad re-send of an accepted part therefore never overwrites its good bytes.
+    """
+    if part.size != expected_size:
+        raise ValueError(f"Part has {part.size} bytes, expected {expected_size}")
+    if part.content_hash != checksum.lower():
+        raise ValueError(f"Checksum mismatch: computed {part.content_hash}")
+
+    with open(file_path, 'r+b') as file:
+        file.seek(offset)
+        for data in part.chunks(COPY_BUFFER_SIZE):
+            file.write(data)
+    return part.content_hash
+
+
+def validate_part_size(part_size: int) -> None:
+    if not settings.IMPORT_UPLOAD_MIN_PART_BYTES <= part_size <= settings.IMPORT_UPLOAD_MAX_PART_BYTES:
+        raise ValueError(
+            f"part_size must be between {settings.IMPORT_UPLOAD_MIN_PART_BYTES} "
+            f"and {settings.IMPORT_UPLOAD_MAX_PART_BYTES} bytes"
+        )
+
@@ -0,0 +1,160 @@
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import parse_numbers
+
+logger = logging.getLogger(__name__)
+
+# Bits of the per-row error bitmap
+MAX_RULES = 64
+
+
+@dataclass(frozen=True)
+class NumberFormat:
+    thousands: str = ','
+    decimal: str = '.'
+
+
+@dataclass(frozen=True)
+class Rule(ABC):
+    """A column predicate evaluated over a whole chunk at once.
+
+    Subclasses return a boolean mask that is True where the value is valid.
+    Empty values pass every rule except Required, and rules on columns the
+    file does not have are skipped.
+    """
+    column: str
+
+    @property
+    def name(self) -> str:
+        return f'{self.column}:{type(self).__name__.lower()}'
+
+    @abstractmethod
+    def valid(self, series: pd.Series, number_format: NumberFormat) -> pd.Series:
+        ...
+
+    @staticmethod
+    def _text(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        text = series.astype('string').str.strip()
+        return text, (text.isna() | (text == '')).fillna(True).astype(bool)
+
+
+@dataclass(frozen=True)
+class Required(Rule):
+    def valid(self, series: pd.Series, number_format: NumberFormat) -> pd.Series:
+        _, empty = self._text(series)
+        return ~empty
+
+
+@dataclass(frozen=True)
+class Pattern(Rule):
+    """Value matches a regular expression in full, e.g. r'\\d{10}' for a NUBAN account number."""
+    pattern: str = ''
+
+    def valid(self, series: pd.Series, number_format: NumberFormat) -> pd.Series:
+        text, empty = self._text(series)
+        return empty | text.str.fullmatch(self.pattern).fillna(False).astype(bool)
+
+
+@dataclass(frozen=True)
+class Length(Rule):
+    minimum: int = 0
+    maximum: Optional[int] = None
+
+    def valid(self, series: pd.Series, number_format: NumberFormat) -> pd.Series:
+        text, empty = self._text(series)
+        lengths = text.str.len()
+        ok = lengths >= self.minimum
+        if self.maximum is not None:
+            ok &= lengths <= self.maximum
+        return empty | ok.fillna(False).astype(bool)
+
+
+@dataclass(frozen=True)
+class Range(Rule):
+    """Value parses as a number (in the file's number format) within [minimum, maximum]."""
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    integer: bool = False
+
+    def valid(self, series: pd.Series, number_format: NumberFormat) -> pd.Series:
+        numbers, empty = parse_numbers(series, number_format.thousands, number_format.decimal)
+        ok = numbers.notna()
+        if self.integer:
+            ok &= numbers % 1 == 0
+        if self.minimum is not None:
+            ok &= numbers >= self.minimum
+        if self.maximum is not None:
+            ok &= numbers <= self.maximum
+        return empty | ok.fillna(False).astype(bool)
+
+
+class RuleSet:
+    """Evaluates a table's rules into one uint64 error bitmap per row.
+
+    Bit i of a row's bitmap is set when rule i failed, so a chunk's result is
+    a single array and a row is valid when its bitmap is 0. Failure counts
+    per rule accumulate in summary across chunks.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"At most {MAX_RULES} validation rules per table")
+        self.rules = list(rules)
+        self.summary: Dict[str, int] = {}
+        self.rows_checked = 0
+        self.rows_invalid = 0
+
+    def evaluate(self, chunk: pd.DataFrame, number_format: NumberFormat = NumberFormat()) -> np.ndarray:
+        bitmap = np.zeros(len(chunk), dtype=np.uint64)
+        for bit, rule in enumerate(self.rules):
+            if rule.column not in chunk.columns:
+                continue
+            failed = ~rule.valid(chunk[rule.column], number_format).to_numpy(dtype=bool)
+            count = int(failed.sum())
+            if count:
+                bitmap[failed] |= np.uint64(1 << bit)
+                self.summary[rule.name] = self.summary.get(rule.name, 0) + count
+
+        self.rows_checked += len(chunk)
+        self.rows_invalid += int(np.count_nonzero(bitmap))
+        return bitmap
+
+    def describe(self, mask: int) -> str:
+        """Names of the rules whose bits are set in a row's bitmap."""
+        return '; '.join(rule.name for bit, rule in enumerate(self.rules) if mask >> bit & 1)
+
+    def errors(self, bitmap: np.ndarray) -> List[Tuple[int, str]]:
+        """(position, failed rule names) of every invalid row, in the form the reject file takes."""
+        positions = np.flatnonzero(bitmap)
+        # Rows usually fail the same few rules, so describe each distinct bitmap once
+        descriptions = {int(mask): self.describe(int(mask)) for mask in np.unique(bitmap[positions])}
+        return [(int(position), descriptions[int(bitmap[position])]) for position in positions]
+
+    def merge(self, report: Dict[str, Any]) -> None:
+        """Adds the counts of a report from another RuleSet over the same rules."""
+        self.rows_checked += report['rows_checked']
+        self.rows_invalid += report['rows_invalid']
+        for name, count in report['failures'].items():
+            self.summary[name] = self.summary.get(name, 0) + count
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'rows_checked': self.rows_checked,
+            'rows_invalid': self.rows_invalid,
+            'failures': dict(self.summary),
+        }
+
+
+def merge_validation_reports(reports: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Adds up the validation reports of the shards of an import."""
+    merged = RuleSet([])
+    for report in reports:
+        if report:
+            merged.merge(report)
+    return merged.report()
@@ -69,13 +69,22 @@
 #         raise
 
 import os
-from celery import shared_task
-from django.db import transaction, DatabaseError
-from .services.csv_processor import CSVProcessor
-from .models import ImportLog
+from datetime import timedelta
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import DatabaseError
+from .services import admission
+from .services.archives import csv_members, is_archive
+from .services.csv_processor import CSVProcessor, ImportSource
+from .services.detection import FileProfile
+from .services.metrics import merge_stage_metrics
+from .services.rejects import merge_shard_rejects
+from .services.validation import merge_validation_reports
+from .services.sharding import Shard, plan_shards, shards_start_records
+from .models import ImportLog, UploadSession
 from django.utils import timezone
 import logging
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional, Union
 from django.core.exceptions import ObjectDoesNotExist
 from celery.exceptions import SoftTimeLimitExceeded
 
@@ -85,7 +94,6 @@ logger = logging.getLogger(__name__)
 @shared_task(
     bind=True,
     max_retries=3,
-    rate_limit='10/m', 
     time_limit=1800,
     soft_time_limit=1700,
     acks_late=True,
@@ -97,70 +105,411 @@ logger = logging.getLogger(__name__)
 )
 def process_csv_import(self, file_path: str, table_name: str, import_log_id: int) -> bool:
     logger.info(f"Starting import task for file: {file_path}, table: {table_name}, log_id: {import_log_id}")
-    
+
+    # Large imports wait in the queue until the shared memory budget has room
+    reserved = _reserve_memory(import_log_id, file_path)
+    if reserved is False:
+        logger.info(f"Memory budget exhausted, deferring import {import_log_id}")
+        # Re-queued rather than retried, so waiting for memory does not use up the retries meant
+        # for errors; the task id is kept so an import resumed after an error can still be claimed
+        process_csv_import.apply_async(
+            args=(file_path, table_name, import_log_id),
+            task_id=self.request.id,
+            retries=self.request.retries,
+            countdown=settings.IMPORT_ADMISSION_RETRY_SECONDS,
+            queue=admission.queue_for(admission.SIZE_LARGE)
+        )
+        return False
+
+    # Status changes are compare-and-set UPDATEs; no row lock is held while the import runs
+    if not ImportLog.claim(import_log_id, self.request.id):
+        if reserved:
+            admission.release(import_log_id)
+        current = ImportLog.objects.filter(id=import_log_id).values_list('status', flat=True).first()
+        if current is None:
+            logger.error(f"ImportLog with id {import_log_id} does not exist.")
+        else:
+            logger.warning(f"Import {import_log_id} could not be claimed (status is '{current}')")
+        return current == 'completed'
+
     try:
-        with transaction.atomic():
-            # Set a timeout for the lock acquisition
-            import_log = ImportLog.objects.select_for_update(nowait=True).get(id=import_log_id)
-            
-            # Early check for file existence
-            if not os.path.exists(file_path):
-                logger.error(f"File not found: {file_path}")
-                import_log.status = 'failed'
-                import_log.error_message = 'File not found'
-                import_log.save()
-                return False
-            
-            if import_log.status == 'processing':
-                logger.warning(f"Import {import_log_id} is already being processed")
-                return False
-            
-            import_log.status = 'processing'
-            import_log.started_at = timezone.now()
-            import_log.save()
-            
-            processor = CSVProcessor(table_name)
-            success = False
-            
-            try:
-                data = processor.read_file(file_path)
-                if processor.validate_table_schema():
-                    success = processor.process_file(file_path, import_log_id)
-                else:
-                    import_log.error_message = f"Invalid table schema for {table_name}"
-            except Exception as e:
-                import_log.error_message = f"Processing error: {str(e)}"
-                raise
-            finally:
+        # Early check for file existence
+        if not os.path.exists(file_path):
+            logger.error(f"File not found: {file_path}")
+            if reserved:
+                admission.release(import_log_id)
+            ImportLog.transition(import_log_id, ['processing'], 'failed', error_message='File not found')
+            return False
+
+        import_log = ImportLog.objects.get(id=import_log_id)
+        processor = CSVProcessor(table_name)
+        success = False
+        fanned_out = False
+        error_message = None
+
+        try:
+            # A profile captured by the upload handler spares the detection pass
+            profile = FileProfile(**import_log.file_profile) if import_log.file_profile else None
+            sheets = CSVProcessor.excel_sheet_names(file_path, import_log.sheets) if import_log.sheets else []
+            if len(sheets) == 1:
+                source = processor.open_sheet_source(file_path, sheets[0])
+            else:
+                source = processor.open_source(file_path, profile)
+            if source.profile is not None:
+                ImportLog.objects.filter(id=import_log_id).update(file_profile=source.profile.to_dict())
+            logger.info(f"Columns in the file for {table_name}: {source.columns}")
+            if processor.validate_table_schema():
+                members = csv_members(file_path) if is_archive(file_path) else []
+                if len(members) > 1:
+                    # Each member is a sub-import reporting back through finalize_csv_import
+                    _dispatch_parts(
+                        process_archive_member, file_path, members, table_name, import_log_id, import_log.size_class
+                    )
+                    fanned_out = True
+                elif len(sheets) > 1:
+                    # As is each selected worksheet
+                    _dispatch_parts(
+                        process_excel_sheet, file_path, sheets, table_name, import_log_id, import_log.size_class
+                    )
+                    fanned_out = True
+                elif shards := _plan_fan_out(source):
+                    # Shards report back through finalize_csv_import
+                    _dispatch_shards(source, shards, table_name, import_log_id, file_path)
+                    fanned_out = True
+                if fanned_out:
+                    ImportLog.objects.filter(id=import_log_id).update(
+                        stage_metrics={**(import_log.stage_metrics or {}), **processor.metrics.to_dict()}
+                    )
+                    return True
+                success = processor.process_file(source, import_log_id)
+            else:
+                error_message = f"Invalid table schema for {table_name}"
+        except Exception as e:
+            error_message = f"Processing error: {str(e)}"
+            raise
+        finally:
+            # The parts of a fanned-out import reserve their own memory
+            if reserved:
+                admission.release(import_log_id)
+
+            # Fanned-out imports are completed by finalize_csv_import
+            if not fanned_out:
                 # Always update the import log status
-                import_log.status = 'completed' if success else 'failed'
-                import_log.completed_at = timezone.now()
-                import_log.save()
-                
-                # Cleanup temporary file
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                except OSError as e:
-                    logger.warning(f"Could not remove file {file_path}: {e}")
-            
-            return success
-            
+                final_fields: Dict[str, Any] = {
+                    'completed_at': timezone.now(),
+                    'stage_metrics': {**(import_log.stage_metrics or {}), **processor.metrics.to_dict()},
+                    'validation_report': processor.validation.report(),
+                }
+                if error_message:
+                    final_fields['error_message'] = error_message
+                ImportLog.transition(
+                    import_log_id, ['processing'], 'completed' if success else 'failed', **final_fields
+                )
+
+                # Cleanup the uploaded file; failed imports keep it so they can be resumed
+                if success:
+                    _remove_files([file_path])
+
+        return success
+
     except SoftTimeLimitExceeded:
         logger.error(f"Task timed out for import {import_log_id}")
-        if 'import_log' in locals():
-            import_log.status = 'failed'
-            import_log.error_message = 'Task timed out'
-            import_log.save()
+        ImportLog.transition(import_log_id, ['processing'], 'failed', error_message='Task timed out')
         raise
-        
+
     except Exception as e:
         logger.error(f"Import task error: {str(e)}")
         if hasattr(self, 'request') and self.request.retries < self.max_retries:
+            # The retry keeps this task id, so it can claim the import again
+            ImportLog.transition(import_log_id, ['processing', 'failed'], 'processing', completed_at=None)
             raise self.retry(exc=e, countdown=60)  # Reduced retry delay
-        if 'import_log' in locals():
-            import_log.status = 'failed'
-            import_log.error_message = f"Error: {str(e)}"
-            import_log.save()
+        ImportLog.transition(import_log_id, ['processing', 'failed'], 'failed', error_message=f"Error: {str(e)}")
         return False
-    
\ No newline at end of file
+
+
+def _reserve_memory(import_log_id: int, file_path: str, part: Optional[int] = None) -> Union[bool, None]:
+    """Reserves memory for a large import or one part of it; returns None for imports that need no reservation."""
+    row = ImportLog.objects.filter(id=import_log_id).values('size_class', 'estimated_records').first()
+    if row is None or row['size_class'] != admission.SIZE_LARGE or not os.path.exists(file_path):
+        return None
+    memory_mb = admission.estimate_memory_mb(
+        os.path.getsize(file_path), row['estimated_records'], CSVProcessor.CHUNK_SIZE
+    )
+    return admission.try_reserve(import_log_id, memory_mb, part)
+
+
+def _plan_fan_out(source: ImportSource) -> List[Shard]:
+    """Shards for splitting a large plain CSV file across parallel tasks; empty to process it serially."""
+    profile = source.profile
+    # UTF-16 files cannot be split on single newline bytes, nor compressed data on byte offsets
+    if profile is None or profile.encoding.startswith('utf-16') or not source.splittable:
+        return []
+    if os.path.getsize(source.file_path) < settings.IMPORT_FANOUT_THRESHOLD_BYTES:
+        return []
+
+    shards = plan_shards(source.file_path, settings.IMPORT_SHARD_BYTES)
+    # A shard starting inside a multi-line quoted field would misparse every row after it
+    if not shards_start_records(source.file_path, shards, profile.quotechar):
+        logger.warning(f"{source.file_path} has line breaks inside quoted fields at shard boundaries, not sharding")
+        return []
+    return shards
+
+
+def _dispatch_shards(
+    source: ImportSource, shards: List[Shard], table_name: str, import_log_id: int, upload_path: str
+) -> None:
+    """Queues one task per byte-range shard, with finalize_csv_import as the chord callback."""
+    assert source.profile is not None
+    profile = source.profile.to_dict()
+
+    header = [
+        process_csv_shard.s(source.file_path, table_name, import_log_id, index, start, end, profile).set(
+            queue=admission.queue_for(admission.SIZE_LARGE)
+        )
+        for index, (start, end) in enumerate(shards, start=1)
+    ]
+    callback = finalize_csv_import.s(import_log_id, [upload_path, source.file_path]).set(
+        queue=admission.queue_for(admission.SIZE_SMALL)
+    )
+    callback.link_error(fail_fanned_out_import.s(import_log_id))
+
+    logger.info(f"Fanning out import {import_log_id} into {len(shards)} shards")
+    chord(header)(callback)
+
+
+def _dispatch_parts(
+    task: Any,
+    file_path: str,
+    parts: List[str],
+    table_name: str,
+    import_log_id: int,
+    size_class: str
+) -> None:
+    """Queues one sub-import task per archive member or worksheet, with finalize_csv_import as the chord callback."""
+    header = [
+        task.s(file_path, table_name, import_log_id, index, part).set(queue=admission.queue_for(size_class))
+        for index, part in enumerate(parts, start=1)
+    ]
+    callback = finalize_csv_import.s(import_log_id, [file_path]).set(
+        queue=admission.queue_for(admission.SIZE_SMALL)
+    )
+    callback.link_error(fail_fanned_out_import.s(import_log_id))
+
+    logger.info(f"Importing {len(parts)} parts of {file_path} in parallel for import {import_log_id}")
+    chord(header)(callback)
+
+
+@shared_task(
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1700,
+    acks_late=True,
+    reject_on_worker_lost=True
+)
+def process_archive_member(
+    self,
+    file_path: str,
+    table_name: str,
+    import_log_id: int,
+    member_index: int,
+    member: str
+) -> Dict[str, Any]:
+    """Streams and loads one member of a multi-member ZIP import."""
+    logger.info(f"Starting member {member_index} ({member}) of import {import_log_id}")
+
+    processor = CSVProcessor(table_name)
+    # Members keep separate checkpoints, numbered like shards
+    return _import_part(
+        self,
+        processor,
+        lambda: processor.open_member_source(file_path, member),
+        file_path,
+        import_log_id,
+        member_index,
+        member
+    )
+
+
+@shared_task(
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1700,
+    acks_late=True,
+    reject_on_worker_lost=True
+)
+def process_excel_sheet(
+    self,
+    file_path: str,
+    table_name: str,
+    import_log_id: int,
+    sheet_index: int,
+    sheet: str
+) -> Dict[str, Any]:
+    """Streams and loads one worksheet of a multi-sheet Excel import."""
+    logger.info(f"Starting sheet {sheet_index} ({sheet}) of import {import_log_id}")
+
+    processor = CSVProcessor(table_name)
+    # Sheets keep separate checkpoints, numbered like shards
+    return _import_part(
+        self,
+        processor,
+        lambda: processor.open_sheet_source(file_path, sheet),
+        file_path,
+        import_log_id,
+        sheet_index,
+        sheet
+    )
+
+
+@shared_task(
+    bind=True,
+    time_limit=1800,
+    soft_time_limit=1700,
+    acks_late=True,
+    reject_on_worker_lost=True
+)
+def process_csv_shard(
+    self,
+    file_path: str,
+    table_name: str,
+    import_log_id: int,
+    shard_index: int,
+    start: int,
+    end: int,
+    profile: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Transforms and loads one byte range of a fanned-out import."""
+    logger.info(f"Starting shard {shard_index} of import {import_log_id}: bytes {start}-{end}")
+
+    processor = CSVProcessor(table_name)
+    return _import_part(
+        self,
+        processor,
+        lambda: processor.open_shard_source(file_path, start, end, FileProfile(**profile)),
+        file_path,
+        import_log_id,
+        shard_index,
+        f"bytes {start}-{end}"
+    )
+
+
+def _import_part(
+    task: Any,
+    processor: CSVProcessor,
+    open_source: Callable[[], ImportSource],
+    file_path: str,
+    import_log_id: int,
+    index: int,
+    label: str
+) -> Dict[str, Any]:
+    """Loads one shard, archive member or worksheet of a fanned-out import; the result goes to finalize_csv_import.
+
+    Each part of a large import reserves memory for itself while it runs,
+    since the parts may run at the same time on the same worker.
+    """
+    reserved = _reserve_memory(import_log_id, file_path, index)
+    if reserved is False:
+        logger.info(f"Memory budget exhausted, deferring part {index} of import {import_log_id}")
+        # Part tasks never retry errors, and a retry stays in the chord
+        raise task.retry(countdown=settings.IMPORT_ADMISSION_RETRY_SECONDS, max_retries=None)
+
+    success = False
+    error = None
+    try:
+        success = processor.process_file(open_source(), import_log_id, increment_progress=True, shard=index)
+    except Exception as e:
+        # Never raise, or the chord callback would not run
+        logger.error(f"Part {index} ({label}) of import {import_log_id} failed: {str(e)}")
+        error = f"{label}: {str(e)}"
+    finally:
+        if reserved:
+            admission.release(import_log_id, index)
+
+    return {
+        'shard': index,
+        'success': success,
+        'rows': processor.rows_loaded,
+        'rejected': processor.rows_rejected,
+        'error': error,
+        'stage_metrics': processor.metrics.to_dict(),
+        'validation_report': processor.validation.report(),
+    }
+
+
+@shared_task
+def finalize_csv_import(results: List[Dict[str, Any]], import_log_id: int, file_paths: List[str]) -> bool:
+    """Chord callback that sets the final status and counts of a fanned-out import."""
+    success = all(result['success'] for result in results)
+    rows = sum(result['rows'] for result in results)
+    rejected = sum(result.get('rejected', 0) for result in results)
+    errors = [f"Shard {result['shard']}: {result['error']}" for result in results if result['error']]
+
+    import_log = ImportLog.objects.get(id=import_log_id)
+    final_fields: Dict[str, Any] = {
+        'successful_records': rows,
+        'completed_at': timezone.now(),
+        'stage_metrics': {
+            **(import_log.stage_metrics or {}),
+            'shards': merge_stage_metrics([result['stage_metrics'] for result in results]),
+        },
+        'validation_report': merge_validation_reports([result.get('validation_report') for result in results]),
+    }
+    if errors:
+        final_fields['error_message'] = '; '.join(errors)
+    # Shards wrote their rejected rows separately; link one file for the whole import
+    reject_file = merge_shard_rejects(import_log_id)
+    if reject_file:
+        final_fields['reject_file'] = reject_file
+    ImportLog.transition(import_log_id, ['processing'], 'completed' if success else 'failed', **final_fields)
+
+    logger.info(f"Import {import_log_id} finished with {len(results)} shards: {rows} rows, {rejected} rejected, success={success}")
+
+    # Failed imports keep their files so they can be resumed
+    if success:
+        _remove_files(file_paths)
+
+    return success
+
+
+@shared_task
+def fail_fanned_out_import(request: Any, exc: Exception, traceback: Any, import_log_id: int) -> None:
+    """Chord error callback for when finalize_csv_import cannot run.
+
+    That happens when a part task dies outside its own error handling, for
+    example at the hard time limit. The import is failed so it can be
+    resumed.
+    """
+    logger.error(f"Fanned-out import {import_log_id} failed: {exc}")
+    ImportLog.transition(
+        import_log_id, ['processing'], 'failed', error_message=f"Error: {exc}", completed_at=timezone.now()
+    )
+
+
+@shared_task
+def expire_upload_sessions() -> int:
+    """Deletes open upload sessions that received no part within IMPORT_UPLOAD_SESSION_TTL, with their files.
+
+    Run periodically by Celery beat; returns the number of sessions deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.IMPORT_UPLOAD_SESSION_TTL)
+    stale = UploadSession.objects.filter(status='open', created_at__lt=cutoff).exclude(parts__created_at__gte=cutoff)
+
+    expired = 0
+    for session_id, file_path in stale.values_list('id', 'file_path'):
+        # A session completed since it was selected is kept
+        deleted, _ = UploadSession.objects.filter(id=session_id, status='open').delete()
+        if deleted:
+            _remove_files([file_path])
+            expired += 1
+    if expired:
+        logger.info(f"Expired {expired} abandoned upload sessions")
+    return expired
+
+
+def _remove_files(file_paths: List[str]) -> None:
+    for path in set(file_paths):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove file {path}: {e}")
@@ -0,0 +1,38 @@
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from .services.db import get_engine
+from .services.loaders import UpsertLoader
+
+
+@override_settings(IMPORT_UPSERT_KEYS={'upsert_probe': ['ippis_number']})
+class UpsertLoaderTests(SimpleTestCase):
+
+    def test_blank_keys_are_staged_as_null(self):
+        loader = UpsertLoader(None, 'upsert_probe')
+        chunk = pd.DataFrame({'ippis_number': ['A1', 'nan', '', ' ', None], 'name': list('abcde')})
+
+        staged = loader._null_blank_keys(chunk)
+
+        self.assertEqual(staged['ippis_number'].tolist(), ['A1', None, None, None, None])
+        self.assertEqual(chunk['ippis_number'].tolist(), ['A1', 'nan', '', ' ', None])
+
+    def test_rows_with_blank_keys_are_all_inserted(self):
+        try:
+            conn = get_engine().connect()
+        except OperationalError:
+            self.skipTest("PostgreSQL is not available")
+
+        with conn:
+            conn.execute(text('CREATE TEMP TABLE upsert_probe (ippis_number text UNIQUE, name text)'))
+            loader = UpsertLoader(get_engine(), 'upsert_probe')
+            chunk = pd.DataFrame({'ippis_number': ['A1', 'nan', 'nan', 'A1'], 'name': ['a', 'b', 'c', 'd']})
+
+            loader.load(chunk, conn)
+            rows = conn.execute(text('SELECT ippis_number, name FROM upsert_probe ORDER BY name')).all()
+            conn.rollback()
+
+        self.assertEqual((loader.last_inserted, loader.last_updated), (3, 0))
+        self.assertEqual([tuple(row) for row in rows], [(None, 'b'), (None, 'c'), ('A1', 'd')])
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler, SkipFile, StopFutureHandlers, TemporaryFileUploadHandler
+)
+
+from .services.compression import compression_from_magic
+from .services.detection import BLOCK_SIZE, FileProfile, profile_from_blocks
+
+logger = logging.getLogger(__name__)
+
+# Uploads whose bytes are not CSV text cannot be line-counted or sniffed
+BINARY_EXTENSIONS = ('.zip', '.xlsx', '.xls')
+
+
+class ProfiledUploadedFile(UploadedFile):
+    """An upload already stored at its final path, with what was learned while writing it."""
+
+    def __init__(self, stored_path: str, name: str, content_type: str, size: int, charset: Optional[str],
+                 content_type_extra: Optional[dict], content_hash: str, line_count: Optional[int],
+                 profile: Optional[FileProfile]):
+        super().__init__(open(stored_path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.stored_path = stored_path
+        self.content_hash = content_hash
+        self.line_count = line_count
+        self.profile = profile
+
+    @property
+    def record_count(self) -> Optional[int]:
+        """Data rows, assuming one header line and no newlines inside quoted fields."""
+        return None if self.line_count is None else max(self.line_count - 1, 0)
+
+
+class ProfilingUploadHandler(FileUploadHandler):
+    """Streams an upload straight to MEDIA_ROOT/imports/ while hashing and profiling it.
+
+    The SHA-256 digest, line count and a head and tail sample are computed
+    from the bytes as they are written, so the file is never read back just
+    to detect its dialect or count its rows. Files larger than
+    MAX_UPLOAD_SIZE are abandoned and deleted as soon as the limit is passed.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = self._create_stored_file(f'imports/{os.path.basename(self.file_name)}')
+        self.hasher = hashlib.sha256()
+        self.text = not self.file_name.lower().endswith(BINARY_EXTENSIONS)
+        self.lines = 0
+        self.last_byte = b''
+        self.head = b''
+        self.tail = b''
+        self.written = 0
+        raise StopFutureHandlers()
+
+    def _create_stored_file(self, name: str):
+        """Creates a new file under an available name, as FileSystemStorage.save does.
+
+        The file is opened exclusively, so an upload of the same name that
+        took the name first is never overwritten; another name is picked
+        instead.
+        """
+        fs = FileSystemStorage()
+        os.makedirs(os.path.dirname(fs.path(name)), exist_ok=True)
+        while True:
+            self.stored_name = fs.get_available_name(name)
+            self.stored_path = fs.path(self.stored_name)
+            try:
+                return open(self.stored_path, 'xb')
+            except FileExistsError:
+                continue
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        self.written += len(raw_data)
+        if self.written > settings.MAX_UPLOAD_SIZE:
+            self.too_large = True
+            self._discard()
+            raise SkipFile()
+
+        self.file.write(raw_data)
+        self.hasher.update(raw_data)
+        if start == 0 and compression_from_magic(raw_data):
+            # Compressed bytes are neither lines nor sniffable; the task profiles the decompressed stream
+            self.text = False
+        if self.text and raw_data:
+            self.lines += raw_data.count(b'\n')
+            self.last_byte = raw_data[-1:]
+            if len(self.head) < BLOCK_SIZE:
+                self.head += raw_data[:BLOCK_SIZE - len(self.head)]
+            self.tail = (self.tail + raw_data)[-BLOCK_SIZE:]
+        return None
+
+    def file_complete(self, file_size: int) -> ProfiledUploadedFile:
+        self.file.close()
+
+        line_count = None
+        profile = None
+        if self.text:
+            # A last line without a trailing newline still counts
+            line_count = self.lines + (1 if self.last_byte not in (b'', b'\n') else 0)
+            profile = self._profile(file_size)
+
+        return ProfiledUploadedFile(
+            self.stored_path, self.file_name, self.content_type, file_size, self.charset,
+            self.content_type_extra, self.hasher.hexdigest(), line_count, profile
+        )
+
+    def upload_interrupted(self) -> None:
+        if hasattr(self, 'file'):
+            self._discard()
+
+    def _profile(self, file_size: int) -> Optional[FileProfile]:
+        blocks = [self.head]
+        if file_size > len(self.head):
+            # Trim the tail to whole lines, like read_sample_blocks does
+            first_newline = self.tail.find(b'\n')
+            if first_newline != -1 and first_newline + 1 < len(self.tail):
+                blocks.append(self.tail[first_newline + 1:])
+        try:
+            return profile_from_blocks(blocks)
+        except Exception as e:
+            logger.warning(f"Could not profile upload {self.file_name}: {e}")
+            return None
+
+    def _discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.stored_path):
+            os.remove(self.stored_path)
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Spools an upload to a temporary file, as Django does, computing its SHA-256 as it is written.
+
+    The digest is set as content_hash on the uploaded file, so upload parts
+    are verified without reading the spooled file back.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> UploadedFile:
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        return file
@@ -1,8 +1,20 @@
 from django.urls import path
-from .views import CSVImportView, upload_page
+from .views import (
+    CSVImportView, ImportResumeView, ImportStatusView, UploadPartView, UploadSessionDetailView,
+    UploadSessionView, upload_page
+)
 
 urlpatterns = [
     path('upload/', upload_page, name='upload_page'),
     path('upload-csv/', CSVImportView.as_view(), name='csv-upload'), 
+    path('upload-csv/<int:import_id>/', ImportStatusView.as_view(), name='csv-upload-status'),
+    path('upload-csv/<int:import_id>/resume/', ImportResumeView.as_view(), name='csv-upload-resume'),
+    path('upload-sessions/', UploadSessionView.as_view(), name='upload-session'),
+    path('upload-sessions/<int:session_id>/', UploadSessionDetailView.as_view(), name='upload-session-detail'),
+    path(
+        'upload-sessions/<int:session_id>/parts/<int:part_number>/',
+        UploadPartView.as_view(),
+        name='upload-session-part'
+    ),
 ]
 
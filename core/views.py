@@ -1,23 +1,119 @@
+import os
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.files.storage import FileSystemStorage
 from django.conf import settings
-from .models import ImportLog
+from django.core.cache import cache
+from .models import ImportLog, UploadPart, UploadSession
+from .serializers import ImportLogSerializer
+from .services.admission import classify_upload, queue_for
+from .services.metrics import StageMetrics
+from .services.schema import TABLE_PLANS
+from .services.uploads import allocate_upload_file, validate_part_size, write_part
 from .tasks import process_csv_import
+from .upload_handlers import HashingUploadHandler, ProfiledUploadedFile, ProfilingUploadHandler
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.request import Request
-from typing import Union
+from typing import Any, List, Optional, Union
 from django.shortcuts import render
 import logging
 logger = logging.getLogger('import_app')
 
+TABLE_NAMES = list(TABLE_PLANS)
+
+def queue_import(
+    file_name: str,
+    table_name: str,
+    file_path: str,
+    file_size: int,
+    metrics: StageMetrics,
+    record_count: Optional[int] = None,
+    **fields: Any
+) -> ImportLog:
+    """Creates the import log for a stored upload and queues it by size class.
+
+    record_count is the exact number of data rows when it was counted during
+    the upload; otherwise it is estimated from the head of the file.
+    """
+    size_class, estimated_records = classify_upload(file_path, file_size, record_count)
+
+    # Create import log
+    import_log = ImportLog.objects.create(
+        file_name=file_name,
+        table_name=table_name,
+        # created_by=request.user.id,
+        total_records=record_count or 0,
+        file_path=file_path,
+        size_class=size_class,
+        estimated_records=estimated_records,
+        stage_metrics=metrics.to_dict(),
+        **fields
+    )
+
+    # Queue processing task on the queue for its size class
+    process_csv_import.apply_async(
+        args=(file_path, table_name, import_log.id),
+        queue=queue_for(size_class)
+    )
+    return import_log
+
+
+def find_duplicate_import(
+    table_name: str, content_hash: str, sheets: Optional[List[str]] = None
+) -> Optional[ImportLog]:
+    """Latest import of identical content (and sheet selection) into the same table, unless duplicates are allowed.
+
+    Failed imports are not duplicates, so the same file can always be uploaded again after one.
+    """
+    if settings.IMPORT_DUPLICATE_POLICY == 'allow':
+        return None
+    imports = ImportLog.objects.filter(table_name=table_name, content_hash=content_hash).exclude(status='failed')
+    # A JSONField filter on None matches JSON null, not the SQL NULL stored for non-Excel uploads
+    imports = imports.filter(sheets__isnull=True) if sheets is None else imports.filter(sheets=sheets)
+    return imports.order_by('-created_at').first()
+
+
+def _parse_sheets(value: Optional[str]) -> Optional[List[str]]:
+    """Sheet selection from the form: None for the active sheet, ['*'] for all sheets."""
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    return ['*'] if '*' in names else (names or None)
+
+
+def _duplicate_response(import_log: ImportLog) -> Response:
+    data = {
+        'import_id': import_log.id,
+        'status': import_log.status,
+        'duplicate': True,
+    }
+    if settings.IMPORT_DUPLICATE_POLICY == 'reject':
+        data['error'] = 'An identical file was already imported into this table'
+        return Response(data, status=status.HTTP_409_CONFLICT)
+
+    logger.info(f"Upload matches import {import_log.id}, returning it instead of importing again")
+    data['message'] = 'Identical file already imported; returning the existing import'
+    return Response(data)
+
+
+def _discard_upload(file: ProfiledUploadedFile) -> None:
+    """Removes an upload that was stored but will not be imported."""
+    file.close()
+    if os.path.exists(file.stored_path):
+        os.remove(file.stored_path)
+
+
 def upload_page(request):
     """Render the HTML page for file upload."""
     return render(request, 'upload.html')
 
 class CSVImportView(APIView):
+    def initialize_request(self, request, *args, **kwargs):
+        # Must be set before anything reads the request body
+        request.upload_handlers = [ProfilingUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     @swagger_auto_schema(
         operation_description="Upload CSV file for data import",
         manual_parameters=[
@@ -35,6 +131,14 @@ class CSVImportView(APIView):
                 required=True,
                 enum=['civil_servant', 'repayment', 'loan_details'],
                 description="Target table for import"
+            ),
+            openapi.Parameter(
+                'sheets',
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Excel only: comma-separated sheet names, or * for every sheet; "
+                            "several sheets are imported in parallel (default: the active sheet)"
             )
         ],
         responses={
@@ -49,51 +153,78 @@ class CSVImportView(APIView):
                 )
             ),
             400: "Invalid request",
+            409: "Identical file already imported into this table (when IMPORT_DUPLICATE_POLICY is 'reject')",
             413: "File too large",
             500: "Server error"
         }
     )
     def post(self, request: Request) -> Response:
         try:
+            # ProfilingUploadHandler streams the file to disk while the body is parsed
+            metrics = StageMetrics()
+            with metrics.stage('upload_save'):
+                files = request.FILES
+
+            # Validate file size
+            if any(getattr(handler, 'too_large', False) for handler in request.upload_handlers):
+                return Response(
+                    {'error': 'File size exceeds 2GB limit'},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+
             # Validate file presence
-            if 'file' not in request.FILES:
+            if 'file' not in files:
                 return Response(
                     {'error': 'No file provided'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            file = request.FILES['file']
+            file = files['file']
             table_name: Union[str, None] = request.data.get('table_name')
 
             # Validate table_name
-            if table_name not in ['civil_servant', 'repayment', 'loan_details']:
+            if table_name not in TABLE_NAMES:
+                _discard_upload(file)
                 return Response(
                     {'error': 'Invalid or missing table_name'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Validate file size
-            if file.size > settings.MAX_UPLOAD_SIZE:
+            sheets = _parse_sheets(request.data.get('sheets'))
+            if sheets and not file.name.lower().endswith(('.xlsx', '.xls')):
+                _discard_upload(file)
                 return Response(
-                    {'error': 'File size exceeds 2GB limit'},
-                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                    {'error': 'sheets can only be given for Excel files'},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Save file
-            fs = FileSystemStorage()
-            filename = fs.save(f'imports/{file.name}', file)
-            file_path = fs.path(filename)
-
-            # Create import log
-            import_log = ImportLog.objects.create(
-                file_name=file.name,
-                table_name=table_name,
-                # created_by=request.user.id,
-                total_records=0
-            )
+            # Hold the digest while checking and creating, so two identical uploads cannot both queue
+            lock_key = f'csv_importer:upload:{table_name}:{file.content_hash}'
+            if not cache.add(lock_key, 1, timeout=60):
+                _discard_upload(file)
+                return Response(
+                    {'error': 'An identical file is being uploaded for this table'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            try:
+                duplicate = find_duplicate_import(table_name, file.content_hash, sheets)
+                if duplicate is not None:
+                    _discard_upload(file)
+                    return _duplicate_response(duplicate)
 
-            # Queue processing task
-            process_csv_import.delay(file_path, table_name, import_log.id)
+                import_log = queue_import(
+                    file.name,
+                    table_name,
+                    file.stored_path,
+                    file.size,
+                    metrics,
+                    record_count=file.record_count,
+                    content_hash=file.content_hash,
+                    file_profile=file.profile.to_dict() if file.profile else None,
+                    sheets=sheets
+                )
+            finally:
+                cache.delete(lock_key)
 
             return Response({
                 'import_id': import_log.id,
@@ -105,3 +236,231 @@ class CSVImportView(APIView):
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class ImportStatusView(APIView):
+    @swagger_auto_schema(
+        operation_description="Get the status, record counts and per-stage metrics of an import",
+        responses={
+            200: ImportLogSerializer,
+            404: "Import not found"
+        }
+    )
+    def get(self, request: Request, import_id: int) -> Response:
+        try:
+            import_log = ImportLog.objects.get(id=import_id)
+        except ImportLog.DoesNotExist:
+            return Response(
+                {'error': 'Import not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(ImportLogSerializer(import_log).data)
+
+
+class ImportResumeView(APIView):
+    @swagger_auto_schema(
+        operation_description="Resume a failed import from its last committed chunk",
+        responses={
+            200: openapi.Response(
+                description="Import resumed",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'import_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING)
+                    }
+                )
+            ),
+            404: "Import not found",
+            409: "Import cannot be resumed"
+        }
+    )
+    def post(self, request: Request, import_id: int) -> Response:
+        try:
+            import_log = ImportLog.objects.get(id=import_id)
+        except ImportLog.DoesNotExist:
+            return Response(
+                {'error': 'Import not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if import_log.status != 'failed':
+            return Response(
+                {'error': f"Only failed imports can be resumed (status is '{import_log.status}')"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if not import_log.file_path or not os.path.exists(import_log.file_path):
+            return Response(
+                {'error': 'The uploaded file is no longer available'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        # Compare-and-set so two concurrent resume requests cannot both queue the import
+        if not ImportLog.transition(import_log.id, ['failed'], 'pending', error_message=None, task_id=None):
+            return Response(
+                {'error': 'Import is already being resumed'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        process_csv_import.apply_async(
+            args=(import_log.file_path, import_log.table_name, import_log.id),
+            queue=queue_for(import_log.size_class)
+        )
+
+        return Response({
+            'import_id': import_log.id,
+            'message': 'Import resumed from its last checkpoint'
+        })
+
+
+def _session_data(session: UploadSession) -> dict:
+    return {
+        'session_id': session.id,
+        'status': session.status,
+        'total_size': session.total_size,
+        'part_size': session.part_size,
+        'total_parts': session.total_parts,
+        'received_parts': sorted(session.parts.values_list('part_number', flat=True)),
+        'import_id': session.import_log_id,
+    }
+
+
+class UploadSessionView(APIView):
+    @swagger_auto_schema(
+        operation_description="Start a chunked upload: parts of part_size bytes are then sent to the parts endpoint",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['file_name', 'table_name', 'total_size', 'part_size'],
+            properties={
+                'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+                'table_name': openapi.Schema(type=openapi.TYPE_STRING, enum=TABLE_NAMES),
+                'total_size': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'part_size': openapi.Schema(type=openapi.TYPE_INTEGER),
+            }
+        ),
+        responses={
+            201: "Upload session created",
+            400: "Invalid request",
+            413: "File too large"
+        }
+    )
+    def post(self, request: Request) -> Response:
+        file_name = os.path.basename(str(request.data.get('file_name') or ''))
+        table_name = request.data.get('table_name')
+        try:
+            total_size = int(request.data.get('total_size'))
+            part_size = int(request.data.get('part_size'))
+            validate_part_size(part_size)
+        except (TypeError, ValueError) as e:
+            return Response({'error': f'Invalid total_size or part_size: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not file_name:
+            return Response({'error': 'No file_name provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if table_name not in TABLE_NAMES:
+            return Response({'error': 'Invalid or missing table_name'}, status=status.HTTP_400_BAD_REQUEST)
+        if total_size <= 0:
+            return Response({'error': 'total_size must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        if total_size > settings.MAX_UPLOAD_SIZE:
+            return Response(
+                {'error': 'File size exceeds 2GB limit'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        session = UploadSession.objects.create(
+            file_name=file_name,
+            file_path=allocate_upload_file(file_name, total_size),
+            table_name=table_name,
+            total_size=total_size,
+            part_size=part_size,
+            total_parts=-(-total_size // part_size),
+        )
+        return Response(_session_data(session), status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    @swagger_auto_schema(
+        operation_description="Get the parts received so far, to resume an interrupted upload",
+        responses={
+            200: "Upload session state",
+            404: "Upload session not found"
+        }
+    )
+    def get(self, request: Request, session_id: int) -> Response:
+        try:
+            session = UploadSession.objects.get(id=session_id)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_session_data(session))
+
+
+class UploadPartView(APIView):
+    def initialize_request(self, request, *args, **kwargs):
+        # Parts are hashed while Django spools them, then copied once into the upload file
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description="Upload one numbered part; the import is queued when the last part arrives",
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=True,
+                description="Bytes of this part"
+            ),
+            openapi.Parameter(
+                'checksum',
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description="SHA-256 hex digest of this part"
+            )
+        ],
+        responses={
+            200: "Part stored",
+            400: "Invalid part or checksum mismatch",
+            404: "Upload session not found",
+            409: "Upload session is already complete"
+        }
+    )
+    def put(self, request: Request, session_id: int, part_number: int) -> Response:
+        try:
+            session = UploadSession.objects.get(id=session_id)
+        except UploadSession.DoesNotExist:
+            return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if session.status != 'open':
+            return Response({'error': 'Upload session is already complete'}, status=status.HTTP_409_CONFLICT)
+        if 'file' not in request.FILES or not request.data.get('checksum'):
+            return Response({'error': 'A file and its checksum are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Verified parts are written into place, so parallel and repeated parts need no reassembly
+        try:
+            offset, size = session.part_range(part_number)
+            digest = write_part(session.file_path, offset, size, request.FILES['file'], request.data['checksum'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        UploadPart.objects.update_or_create(
+            session=session, part_number=part_number, defaults={'size': size, 'checksum': digest}
+        )
+
+        # Only the request that moves the session out of 'open' queues the import
+        if session.parts.count() == session.total_parts and UploadSession.objects.filter(
+            id=session.id, status='open'
+        ).update(status='completing'):
+            try:
+                import_log = queue_import(
+                    session.file_name, session.table_name, session.file_path, session.total_size, StageMetrics()
+                )
+            except Exception:
+                UploadSession.objects.filter(id=session.id).update(status='open')
+                raise
+            UploadSession.objects.filter(id=session.id).update(status='completed', import_log=import_log)
+            logger.info(f"Upload session {session.id} complete, queued import {import_log.id}")
+
+        session.refresh_from_db()
+        return Response(_session_data(session))
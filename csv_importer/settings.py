@@ -20,6 +20,75 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 MAX_UPLOAD_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
 
+# Bulk loader per target table: 'copy' (COPY ... FROM STDIN), 'to_sql' (multi-row INSERT)
+# or 'upsert' (COPY into an UNLOGGED staging table, then INSERT ... ON CONFLICT on IMPORT_UPSERT_KEYS)
+IMPORT_DEFAULT_LOADER = 'copy'
+IMPORT_LOADERS = {
+    'civil_servant': 'copy',
+    'repayment': 'copy',
+    'loan_details': 'copy',
+}
+
+# Natural key per table for the 'upsert' loader; each needs a unique index on the table
+IMPORT_UPSERT_KEYS = {
+    'civil_servant': ['ippis_number'],
+    'repayment': ['ippis_no', 'year', 'month_field', 'product_id'],
+    'loan_details': ['ippis_number', 'disbursement_dates', 'loan_type'],
+}
+
+# What rows failing the table plans in core.services.schema do: 'report' loads them and only counts
+# failures per rule in ImportLog.validation_report, 'reject' quarantines them in the reject file
+IMPORT_VALIDATION_MODE = os.getenv('IMPORT_VALIDATION_MODE', 'report')
+
+# Rows the database rejects are isolated into MEDIA_ROOT/rejects/; past this many the import fails
+IMPORT_MAX_REJECTED_ROWS = 10000
+
+# Connection pool for the SQLAlchemy engine shared by imports in each worker process
+IMPORT_DB_POOL = {
+    'pool_size': int(os.getenv('IMPORT_DB_POOL_SIZE', '5')),
+    'max_overflow': int(os.getenv('IMPORT_DB_MAX_OVERFLOW', '5')),
+    'pool_timeout': 30,
+    'pool_recycle': 1800,  # seconds
+}
+
+# Seconds reference-table lookups (categories, products) stay cached in CACHES
+IMPORT_LOOKUP_CACHE_TTL = 600
+
+# CSV uploads at least this large are split into shards processed by parallel tasks
+IMPORT_FANOUT_THRESHOLD_BYTES = 256 * 1024 * 1024  # 256MB
+IMPORT_SHARD_BYTES = 64 * 1024 * 1024  # 64MB
+
+# Uploads at or above either limit are 'large' and go to their own queue
+IMPORT_LARGE_FILE_BYTES = 50 * 1024 * 1024  # 50MB
+IMPORT_LARGE_ROW_COUNT = 500000
+IMPORT_QUEUES = {
+    'small': 'imports_small',
+    'large': 'imports_large',
+}
+
+# Admission control for large imports: memory all workers may reserve at once
+IMPORT_WORKER_MEMORY_BUDGET_MB = int(os.getenv('IMPORT_WORKER_MEMORY_BUDGET_MB', '4096'))
+IMPORT_BASELINE_MEMORY_MB = 150  # interpreter, pandas and connection pool
+IMPORT_MEMORY_EXPANSION = 10  # in-memory DataFrame size relative to raw chunk bytes
+IMPORT_RESERVATION_TTL = 2100  # seconds; matches the task hard time limit
+IMPORT_ADMISSION_RETRY_SECONDS = 30
+
+# Worker processes transforming the chunks of each import (rename, lookups, validation, cleaning);
+# 0 transforms in the task's own process. Parsing and loading stay on one process and connection.
+IMPORT_TRANSFORM_WORKERS = int(os.getenv('IMPORT_TRANSFORM_WORKERS', '0'))
+# Load transformed chunks in file order; unordered loads each chunk as soon as it is ready
+IMPORT_TRANSFORM_ORDERED = os.getenv('IMPORT_TRANSFORM_ORDERED', 'true').lower() == 'true'
+
+# What an upload identical (by SHA-256) to an earlier import into the same table does:
+# 'return_existing' answers with the earlier import_id, 'reject' answers 409, 'allow' imports again
+IMPORT_DUPLICATE_POLICY = os.getenv('IMPORT_DUPLICATE_POLICY', 'return_existing')
+
+# Chunked upload sessions: every part but the last must be part_size bytes
+IMPORT_UPLOAD_MIN_PART_BYTES = 5 * 1024 * 1024  # 5MB
+IMPORT_UPLOAD_MAX_PART_BYTES = 100 * 1024 * 1024  # 100MB
+# Open sessions with no part received for this long are deleted with their preallocated files
+IMPORT_UPLOAD_SESSION_TTL = int(os.getenv('IMPORT_UPLOAD_SESSION_TTL', str(24 * 3600)))  # seconds
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent